@@ -0,0 +1,72 @@
+"""
+Measures the import time of the shell with python -X importtime.
+
+The shell is imported in a fresh interpreter, then the same happens with the heavy backends (the ones which used to be
+imported at module load) imported eagerly as well, which shows what the lazy imports save. Run it from the root of the
+repository:
+
+    python benchmarks/import_time.py [--repeat N]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["mysql.connector", "openpyxl", "faker", "numpy", "matplotlib.pyplot"]
+
+
+def import_times(statement: str) -> tuple[int, set[str]]:
+    """
+    Executes an import statement in a fresh interpreter.
+
+    :param statement: the import statement
+    :return: the total import time (in microseconds) and the names of the imported modules
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT, capture_output=True,
+                            text=True, check=True)
+    total, modules = 0, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        if not name[1:].startswith(" "):  # top-level imports include the time of the nested ones
+            total += int(cumulative)
+    return total, modules
+
+
+def best_time(statement: str, repeat: int) -> tuple[int, set[str]]:
+    """
+    Returns the best of multiple measurements of an import statement.
+
+    :param statement: the import statement
+    :param repeat: the number of measurements
+    :return: the best total time (in microseconds) and the names of the imported modules
+    """
+    return min((import_times(statement) for _ in range(repeat)), key=lambda result: result[0])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="the number of measurements (the best one is shown)")
+    args = parser.parse_args()
+
+    lazy, modules = best_time("import data.project.shell", args.repeat)
+    eager, _ = best_time("; ".join(f"import {name}" for name in HEAVY_MODULES + ["data.project.shell"]),
+                          args.repeat)
+
+    print(f"{'heavy module':<24}{'loaded by the shell':>20}")
+    for name in HEAVY_MODULES:
+        print(f"{name:<24}{'yes' if name in modules else 'no':>20}")
+    print()
+    for label, time in [("import data.project.shell (lazy)", lazy),
+                        ("with the heavy backends imported eagerly", eager), ("saved", eager - lazy)]:
+        print(f"{label + ':':<44}{time / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Benchmarks the hot paths of the project: the generation of datasets, the reading and writing of every format (with
+a local SQLite database standing in for MySQL), and the queries (with rendering disabled).
+
+Every benchmark reports its best time, rows/s and the peak of the traced memory allocations. A benchmark which
+fails is reported with its error, and the rest of the suite still runs. The results can be saved as JSON and compared
+with an earlier run. Run it from the root of the repository:
+
+    python benchmarks/suite.py [--groups generate handlers queries] [--scale N] [--repeat N]
+                               [--output results.json] [--compare baseline.json] [--threshold 0.1]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.project.model import CompanyDataset  # noqa: E402
+
+GROUPS = ["generate", "handlers", "queries"]
+
+
+def measure(name: str, function: Callable[[], Any], rows: int, repeat: int,
+            setup: Callable[[], Any] = None) -> dict:
+    """
+    Measures a function: the best of the timed runs, then one more run with tracemalloc (which slows it down) for the
+    peak memory. If a run fails, the benchmark is reported as failed with the error instead.
+
+    :param name: the name of the benchmark
+    :param function: the function
+    :param rows: the number of rows processed by a call
+    :param repeat: the number of timed runs
+    :param setup: the function which is called (untimed) before every run
+    :return: the result
+    """
+    best = float("inf")
+    try:
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            gc.collect()
+            start = time.perf_counter()
+            function()
+            best = min(best, time.perf_counter() - start)
+
+        if setup is not None:
+            setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        print(f"{name:<50}{rows:>10}  failed: {error}", flush=True)
+        return {"name": name, "rows": rows, "seconds": None, "rows_per_second": None, "peak_bytes": None,
+                "error": error}
+
+    result = {"name": name, "rows": rows, "seconds": best, "rows_per_second": rows / best if best > 0 else None,
+              "peak_bytes": peak}
+    print(f"{name:<50}{rows:>10}{best * 1000:>12.1f} ms{result['rows_per_second'] or 0:>14.0f} rows/s"
+          f"{peak / 2 ** 20:>10.1f} MiB", flush=True)
+    return result
+
+
+def rows_of(dataset) -> int:
+    return sum(len(entities) for entities in dataset.entities().values())
+
+
+def fixture(scale: int) -> CompanyDataset:
+    """
+    Generates the dataset of the handler and query benchmarks. Faker may repeat job and company names, which are
+    primary keys, so only the first job and company of every name is kept (the people still refer to them).
+
+    :param scale: the number of people
+    :return: the dataset
+    """
+    dataset = CompanyDataset.generate(scale, max(scale // 100, 10), max(scale // 1000, 5), seed=0, vectorized=True)
+    return CompanyDataset.from_sequence([dataset.people, _unique(dataset.jobs), _unique(dataset.companies)])
+
+
+def _unique(entities: list) -> list:
+    first = {}
+    for entity in entities:
+        first.setdefault(entity.name, entity)
+    return list(first.values())
+
+
+def generate_benchmarks(scale: int, repeat: int) -> list[dict]:
+    """
+    Benchmarks the generation at a tenth of the scale, at the scale and at ten times the scale (the latter only once).
+
+    :param scale: the number of people
+    :param repeat: the number of timed runs
+    :return: the results
+    """
+    results = []
+    for people, times in [(scale // 10, repeat), (scale, repeat), (scale * 10, 1)]:
+        counts = (people, max(people // 100, 10), max(people // 1000, 5))
+        results.append(measure(f"generate/{people}", lambda: CompanyDataset.generate(*counts, seed=0), sum(counts),
+                               times))
+        results.append(measure(f"generate/{people}/vectorized",
+                               lambda: CompanyDataset.generate(*counts, seed=0, vectorized=True), sum(counts), times))
+    return results
+
+
+def handler_benchmarks(scale: int, repeat: int) -> list[dict]:
+    """
+    Benchmarks writing and reading a dataset in every format.
+
+    :param scale: the number of people
+    :param repeat: the number of timed runs
+    :return: the results
+    """
+    from data.project.formats import get_format, format_names, is_database
+    from data.project.columnar import ColumnarCompanyDataset
+
+    dataset = fixture(scale)
+    rows = rows_of(dataset)
+    results = []
+    directory = tempfile.mkdtemp(prefix="benchmark-")
+    try:
+        for name in format_names():
+            if is_database(name) and name != "sqlite":
+                continue
+            try:
+                handler = get_format(name)
+            except ImportError as e:
+                print(f"{name}: skipped ({e})")
+                continue
+
+            path = os.path.join(directory, name)
+
+            def reset() -> None:
+                shutil.rmtree(path, ignore_errors=True)
+                os.makedirs(path)
+
+            if name == "sqlite":
+                database = os.path.join(path, "dataset.db")
+                results.append(measure(
+                    f"write/{name}", lambda: _with_sqlite(database, lambda c: handler.write_dataset(dataset, c)), rows,
+                    repeat, setup=reset))
+                results.append(measure(
+                    f"read/{name}", lambda: _with_sqlite(database, lambda c: handler.read_dataset(CompanyDataset, c)),
+                    rows, repeat))
+                continue
+
+            results.append(measure(f"write/{name}", lambda: handler.write_dataset(dataset, path), rows, repeat,
+                                   setup=reset))
+            results.append(measure(f"read/{name}", lambda: handler.read_dataset(CompanyDataset, path), rows, repeat))
+            if name in ("snapshot", "parquet"):
+                results.append(measure(f"read/{name}/columnar",
+                                       lambda: _load_columns(handler.read_dataset(ColumnarCompanyDataset, path)), rows,
+                                       repeat))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def _load_columns(dataset) -> None:
+    for entity_type in dataset.entity_types():
+        for name in entity_type.field_names():
+            dataset.column(entity_type, name)
+
+
+def _with_sqlite(database: str, function: Callable[[sqlite3.Connection], Any]) -> Any:
+    connection = sqlite3.connect(database)
+    try:
+        return function(connection)
+    finally:
+        connection.close()
+
+
+def query_benchmarks(scale: int, repeat: int) -> list[dict]:
+    """
+    Benchmarks the queries on datasets of objects and on columnar datasets, then the visualizations (without
+    displaying or saving the figures).
+
+    :param scale: the number of people
+    :param repeat: the number of timed runs
+    :return: the results
+    """
+    import data.project.query as query
+    from data.project.columnar import ColumnarCompanyDataset
+    from data.project.render import headless
+
+    dataset = fixture(scale)
+    datasets = {"objects": dataset, "columnar": ColumnarCompanyDataset.from_objects(dataset)}
+    functions = [query.avg_age_by_company, query.employees_by_companies, query.distribution_of_paygrades,
+                 query.genders_by_ages, query.salaries_by_jobs_with_limit, query.employees_by_countries_and_sexes]
+
+    results = []
+    for kind, instance in datasets.items():
+        for function in functions:
+            results.append(measure(f"query/{function.__name__}/{kind}", lambda: function(instance), len(dataset.people),
+                                   repeat))
+
+    with headless():
+        import matplotlib.pyplot as plt
+        from data.project.visualization import QUERIES
+
+        for name, visualize in QUERIES.items():
+            results.append(measure(f"visualize/{name}", lambda: plt.close(visualize(dataset, show=False)),
+                                   len(dataset.people), repeat))
+    return results
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> int:
+    """
+    Compares results with a baseline, and prints the changes of the times.
+
+    :param results: the results
+    :param baseline: the results of the baseline
+    :param threshold: the relative slowdown which is reported as a regression
+    :return: the number of regressions
+    """
+    previous = {result["name"]: result for result in baseline}
+    regressions = 0
+    print(f"\n{'benchmark':<50}{'baseline':>12}{'current':>12}{'change':>10}")
+    for result in results:
+        if result["name"] not in previous or result["seconds"] is None or previous[result["name"]]["seconds"] is None:
+            continue
+        before, after = previous[result["name"]]["seconds"], result["seconds"]
+        change = after / before - 1 if before > 0 else 0.0
+        regression = change > threshold
+        regressions += regression
+        print(f"{result['name']:<50}{before * 1000:>9.1f} ms{after * 1000:>9.1f} ms{change:>+10.1%}"
+              f"{'  REGRESSION' if regression else ''}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=GROUPS, help="the groups of benchmarks to run")
+    parser.add_argument("--scale", type=int, default=10000, help="the number of people in the datasets")
+    parser.add_argument("--repeat", type=int, default=3, help="the number of timed runs (the best one is kept)")
+    parser.add_argument("--output", metavar="FILE", help="saves the results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="compares the results with an earlier output")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="the relative slowdown which counts as a regression (default: 0.1)")
+    args = parser.parse_args()
+
+    benchmarks = {"generate": generate_benchmarks, "handlers": handler_benchmarks, "queries": query_benchmarks}
+    print(f"{'benchmark':<50}{'rows':>10}{'best':>15}{'throughput':>21}{'peak':>14}")
+    results = [result for group in args.groups for result in benchmarks[group](args.scale, args.repeat)]
+    failures = [result["name"] for result in results if "error" in result]
+    if failures:
+        print(f"\n{len(failures)} failed: {', '.join(failures)}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"python": platform.python_version(), "platform": platform.platform(), "scale": args.scale,
+                       "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline.get("scale") != args.scale:
+            print(f"warning: the baseline was measured at scale {baseline.get('scale')}")
+        return 1 if compare(results, baseline["results"], args.threshold) or failures else 0
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Type, Iterable, Iterator, AsyncIterator, Callable, TypeVar
+
+from data.project.base import Entity, Dataset
+from data.project.handler import CSVHandler, JSONHandler, JSONLinesHandler, SQLHandler, LoadReport
+from data.project.interning import StringPool, string_pool
+from data.project.pool import ConnectionPool
+
+T = TypeVar("T")
+
+max_workers = 4
+_executor = None
+_done = object()
+
+
+def executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool of the blocking work of the async handlers (file I/O, parsing, database calls). It is
+    bounded by max_workers, so a large load cannot occupy every thread of the event loop's default executor.
+
+    :return: the executor
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async-handler")
+    return _executor
+
+
+async def _run(function: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Executes a blocking function in the thread pool of the async handlers.
+
+    :param function: the function
+    :param args: the positional arguments
+    :param kwargs: the keyword arguments
+    :return: the result of the function
+    """
+    return await asyncio.get_running_loop().run_in_executor(executor(), partial(function, *args, **kwargs))
+
+
+def _batched(iterable: Iterable[T], batch_size: int) -> Iterator[list[T]]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+async def _iterate(batches: Callable[[], Iterator[list[T]]]) -> AsyncIterator[T]:
+    """
+    Iterates a blocking iterator of batches without blocking the event loop: the iterator is created and advanced
+    in the thread pool, one batch at a time, and the elements of the batches are yielded.
+
+    :param batches: the function which creates the iterator of batches
+    :return: the async iterator of elements
+    """
+    iterator = await _run(batches)
+    try:
+        while (batch := await _run(next, iterator, _done)) is not _done:
+            for element in batch:
+                yield element
+    finally:
+        if hasattr(iterator, "close"):
+            await _run(iterator.close)
+
+
+class AsyncCSVHandler:
+    """
+    An asyncio variant of CSVHandler: the documents are read and parsed in a bounded thread pool, batch by batch, and
+    the collections of a dataset are handled concurrently.
+    """
+
+    @staticmethod
+    def iter_entity(entity_type: Type[Entity], path: str, file_name: str = None, extension: str = ".csv",
+                    delimiter: str = ";", batch_size: int = 1000, strings: StringPool = None) -> AsyncIterator[Entity]:
+        """
+        Lazily reads entries from a CSV document (use it with async for).
+
+        :param entity_type: the type of entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param delimiter: the delimiter
+        :param batch_size: the number of rows which are parsed by a single call in the thread pool
+        :param strings: the pool which interns the repeated strings of the entries as they are read
+        :return: the async iterator of elements
+        """
+        return _iterate(partial(CSVHandler.iter_entity, entity_type, path, file_name=file_name, extension=extension,
+                                delimiter=delimiter, batch_size=batch_size, strings=strings))
+
+    @staticmethod
+    async def read_entity(entity_type: Type[Entity], path: str, file_name: str = None, extension: str = ".csv",
+                          delimiter: str = ";", strings: StringPool = None) -> list[Entity]:
+        """
+        Reads entries from a CSV document.
+
+        :param entity_type: the type of entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param delimiter: the delimiter
+        :param strings: the pool which interns the repeated strings of the entries as they are read
+        :return: the list of elements
+        """
+        return await _run(CSVHandler.read_entity, entity_type, path, file_name=file_name, extension=extension,
+                          delimiter=delimiter, strings=strings)
+
+    @staticmethod
+    async def write_entity(entities: Iterable[Entity], path: str, file_name: str = None, extension: str = ".csv",
+                           delimiter: str = ";", entity_type: Type[Entity] = None) -> int:
+        """
+        Writes entries to a CSV document.
+
+        :param entities: the entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param delimiter: the delimiter
+        :param entity_type: the type of entries, it is needed only when the iterable can be empty
+        :return: the number of written entries
+        """
+        return await _run(CSVHandler.write_entity, entities, path, file_name=file_name, extension=extension,
+                          delimiter=delimiter, entity_type=entity_type)
+
+    @staticmethod
+    async def read_dataset(dataset_type: Type[Dataset], path: str) -> Dataset:
+        """
+        Reads a dataset from multiple CSV documents, concurrently.
+
+        :param dataset_type: the type of the dataset
+        :param path: the path of the documents
+        :return: the instance
+        """
+        strings = string_pool(dataset_type)
+        return dataset_type.from_sequence(list(await asyncio.gather(
+            *[AsyncCSVHandler.read_entity(entity_type, path, strings=strings)
+              for entity_type in dataset_type.entity_types()]
+        )), strings=strings)
+
+    @staticmethod
+    async def write_dataset(dataset: Dataset, path: str) -> None:
+        """
+        Writes a dataset to multiple CSV documents, concurrently.
+
+        :param dataset: the dataset instance
+        :param path: the path of the documents
+        :return: nothing
+        """
+        await asyncio.gather(*[
+            AsyncCSVHandler.write_entity(entities, path, entity_type=entity_type)
+            for entity_type, entities in dataset.entities().items()
+        ])
+
+
+class AsyncJSONHandler:
+    """
+    An asyncio variant of JSONHandler. A JSON document is parsed at once, so a document is read by a single call in
+    the thread pool; the collections of a dataset are handled concurrently.
+    """
+
+    @staticmethod
+    async def read_entity(entity_type: Type[Entity], path: str, file_name: str = None,
+                          extension: str = ".json", strings: StringPool = None) -> list[Entity]:
+        """
+        Reads entries from a JSON document.
+
+        :param entity_type: the type of entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param strings: the pool which interns the repeated strings of the entries as they are read
+        :return: the list of elements
+        """
+        return await _run(JSONHandler.read_entity, entity_type, path, file_name=file_name, extension=extension,
+                          strings=strings)
+
+    @staticmethod
+    async def write_entity(entities: list[Entity], path: str, file_name: str = None, extension: str = ".json",
+                           pretty: bool = True) -> None:
+        """
+        Writes entries to a JSON document.
+
+        :param entities: the entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param pretty: tells whether the file should be indented or not
+        :return: nothing
+        """
+        await _run(JSONHandler.write_entity, entities, path, file_name=file_name, extension=extension, pretty=pretty)
+
+    @staticmethod
+    async def read_dataset(dataset_type: Type[Dataset], path: str) -> Dataset:
+        """
+        Reads a dataset from multiple JSON documents, concurrently.
+
+        :param dataset_type: the type of the dataset
+        :param path: the path of the documents
+        :return: the instance
+        """
+        strings = string_pool(dataset_type)
+        return dataset_type.from_sequence(list(await asyncio.gather(
+            *[AsyncJSONHandler.read_entity(entity_type, path, strings=strings)
+              for entity_type in dataset_type.entity_types()]
+        )), strings=strings)
+
+    @staticmethod
+    async def write_dataset(dataset: Dataset, path: str) -> None:
+        """
+        Writes a dataset to multiple JSON documents, concurrently.
+
+        :param dataset: the dataset instance
+        :param path: the path of the documents
+        :return: nothing
+        """
+        await asyncio.gather(*[
+            AsyncJSONHandler.write_entity(entities, path, file_name=entity_type.collection_name())
+            for entity_type, entities in dataset.entities().items()
+        ])
+
+
+class AsyncJSONLinesHandler:
+    """
+    An asyncio variant of JSONLinesHandler: the lines are read and decoded in a bounded thread pool, batch by batch,
+    and the collections of a dataset are handled concurrently.
+    """
+
+    @staticmethod
+    def iter_entity(entity_type: Type[Entity], path: str, file_name: str = None, extension: str = ".jsonl",
+                    batch_size: int = 1000, strings: StringPool = None) -> AsyncIterator[Entity]:
+        """
+        Lazily reads entries from a JSON Lines document (use it with async for).
+
+        :param entity_type: the type of entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param batch_size: the number of lines which are decoded by a single call in the thread pool
+        :param strings: the pool which interns the repeated strings of the entries as they are read
+        :return: the async iterator of elements
+        """
+        return _iterate(partial(JSONLinesHandler.iter_entity, entity_type, path, file_name=file_name,
+                                extension=extension, batch_size=batch_size, strings=strings))
+
+    @staticmethod
+    async def read_entity(entity_type: Type[Entity], path: str, file_name: str = None,
+                          extension: str = ".jsonl", strings: StringPool = None) -> list[Entity]:
+        """
+        Reads entries from a JSON Lines document.
+
+        :param entity_type: the type of entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param strings: the pool which interns the repeated strings of the entries as they are read
+        :return: the list of elements
+        """
+        return await _run(JSONLinesHandler.read_entity, entity_type, path, file_name=file_name, extension=extension,
+                          strings=strings)
+
+    @staticmethod
+    async def write_entity(entities: Iterable[Entity], path: str, file_name: str = None, extension: str = ".jsonl",
+                           entity_type: Type[Entity] = None) -> int:
+        """
+        Writes entries to a JSON Lines document.
+
+        :param entities: the entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param entity_type: the type of entries, it is needed only when the iterable can be empty
+        :return: the number of written entries
+        """
+        return await _run(JSONLinesHandler.write_entity, entities, path, file_name=file_name, extension=extension,
+                          entity_type=entity_type)
+
+    @staticmethod
+    async def read_dataset(dataset_type: Type[Dataset], path: str) -> Dataset:
+        """
+        Reads a dataset from multiple JSON Lines documents, concurrently.
+
+        :param dataset_type: the type of the dataset
+        :param path: the path of the documents
+        :return: the instance
+        """
+        strings = string_pool(dataset_type)
+        return dataset_type.from_sequence(list(await asyncio.gather(
+            *[AsyncJSONLinesHandler.read_entity(entity_type, path, strings=strings)
+              for entity_type in dataset_type.entity_types()]
+        )), strings=strings)
+
+    @staticmethod
+    async def write_dataset(dataset: Dataset, path: str) -> None:
+        """
+        Writes a dataset to multiple JSON Lines documents, concurrently.
+
+        :param dataset: the dataset instance
+        :param path: the path of the documents
+        :return: nothing
+        """
+        await asyncio.gather(*[
+            AsyncJSONLinesHandler.write_entity(entities, path, entity_type=entity_type)
+            for entity_type, entities in dataset.entities().items()
+        ])
+
+
+class AsyncSQLHandler:
+    """
+    An asyncio variant of SQLHandler over a pool of connections. The blocking database calls are made in a bounded
+    thread pool, on pooled connections, so the tables of a dataset can be read concurrently. A pool of SQLite
+    connections (see sqlite_backend) can stand in for MySQL.
+    """
+
+    @staticmethod
+    async def iter_entity(entity_type: Type[Entity], pool: ConnectionPool, table_name: str = None, where: str = None,
+                          params: Iterable = (), batch_size: int = 1000,
+                          strings: StringPool = None) -> AsyncIterator[Entity]:
+        """
+        Lazily reads entries from a database table (use it with async for). A pooled connection is held until the
+        iteration ends.
+
+        :param entity_type: the type of entries
+        :param pool: the pool of connections
+        :param table_name: the name of the database table
+        :param where: an optional SQL condition
+        :param params: the parameters of the condition
+        :param batch_size: the number of rows which are fetched by a single call in the thread pool
+        :param strings: the pool which interns the repeated strings of the entries as they are read
+        :return: the async iterator of elements
+        """
+        connection = await _run(pool.acquire)
+        try:
+            async for entity in _iterate(lambda: _batched(
+                    SQLHandler.iter_entity(entity_type, connection, table_name=table_name, where=where, params=params,
+                                           batch_size=batch_size, strings=strings), batch_size)):
+                yield entity
+        finally:
+            pool.release(connection)
+
+    @staticmethod
+    async def read_entity(entity_type: Type[Entity], pool: ConnectionPool, table_name: str = None, where: str = None,
+                          params: Iterable = (), strings: StringPool = None) -> list[Entity]:
+        """
+        Reads entries from a database table.
+
+        :param entity_type: the type of entries
+        :param pool: the pool of connections
+        :param table_name: the name of the database table
+        :param where: an optional SQL condition
+        :param params: the parameters of the condition
+        :param strings: the pool which interns the repeated strings of the entries as they are read
+        :return: the list of elements
+        """
+        def read() -> list[Entity]:
+            with pool.connection() as connection:
+                return SQLHandler.read_entity(entity_type, connection, table_name=table_name, where=where,
+                                              params=params, strings=strings)
+
+        return await _run(read)
+
+    @staticmethod
+    async def write_entity(entities: Iterable[Entity], pool: ConnectionPool, table_name: str = None,
+                           create: bool = True, entity_type: Type[Entity] = None) -> LoadReport:
+        """
+        Writes entries to a database table (see SQLHandler.bulk_load).
+
+        :param entities: the entries
+        :param pool: the pool of connections
+        :param table_name: the name of the database table
+        :param create: tells whether the table should be created (and a previous instance should be dropped)
+        :param entity_type: the type of entries, it is needed only when the iterable can be empty
+        :return: the report of the load
+        """
+        def write() -> LoadReport:
+            with pool.connection() as connection:
+                return SQLHandler.write_entity(entities, connection, table_name=table_name, create=create,
+                                               entity_type=entity_type)
+
+        return await _run(write)
+
+    @staticmethod
+    async def read_dataset(dataset_type: Type[Dataset], pool: ConnectionPool) -> Dataset:
+        """
+        Reads a dataset from a database, the tables concurrently.
+
+        :param dataset_type: the type of the dataset
+        :param pool: the pool of connections
+        :return: the instance
+        """
+        strings = string_pool(dataset_type)
+        return dataset_type.from_sequence(list(await asyncio.gather(
+            *[AsyncSQLHandler.read_entity(entity_type, pool, strings=strings)
+              for entity_type in dataset_type.entity_types()]
+        )), strings=strings)
+
+    @staticmethod
+    async def write_dataset(dataset: Dataset, pool: ConnectionPool, chunk_size: int = 1000) -> list[LoadReport]:
+        """
+        Writes a dataset to a database (see SQLHandler.write_dataset, which loads the tables concurrently).
+
+        :param dataset: the dataset instance
+        :param pool: the pool of connections
+        :param chunk_size: the number of rows per statement (and transaction)
+        :return: the reports of the loads of the tables
+        """
+        return await _run(SQLHandler.write_dataset, dataset, pool, chunk_size=chunk_size)
+
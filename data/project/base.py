@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Type
+from typing import Type, Sequence, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from data.project.interning import StringPool
 
 
 class Entity(ABC):
@@ -9,21 +12,26 @@ class Entity(ABC):
     A class that represents a type which can be managed with our library.
     """
 
+    __slots__ = ()
+
     @staticmethod
     @abstractmethod
-    def from_sequence(seq: list[str]) -> Entity:
+    def from_sequence(seq: Sequence, strings: StringPool = None) -> Entity:
         """
-        Returns an instance from a sequence of string values.
+        Returns an instance from a sequence of values (in the order of field_names). The values can be strings or values
+        of the field types. The handlers read the rows with a pool of strings, so the values of the interned fields (see
+        interned_fields) are shared as each row is converted, instead of after the whole collection has been read.
 
         :param seq: the sequence of values
+        :param strings: the pool which interns the values of the interned fields, they are kept as they are without it
         :return: the instance
         """
         pass
 
     @abstractmethod
-    def to_sequence(self) -> list[str]:
+    def to_sequence(self) -> Sequence:
         """
-        Returns a sequence of string values that describe the state of the type.
+        Returns a sequence of values (in the order of field_names) that describe the state of the type.
 
         :return: the sequence of values
         """
@@ -31,14 +39,24 @@ class Entity(ABC):
 
     @staticmethod
     @abstractmethod
-    def field_names() -> list[str]:
+    def field_names() -> Sequence[str]:
         """
-        Returns the list of field (attribute) names.
+        Returns the sequence of field (attribute) names. Implementations should return a precomputed tuple.
 
-        :return: the list of names
+        :return: the sequence of names
         """
         pass
 
+    @staticmethod
+    def interned_fields() -> Sequence[str]:
+        """
+        Returns the names of the string fields whose values are frequently repeated (like foreign keys), so the equal
+        values of a dataset should share one string object. Implementations should return a precomputed tuple.
+
+        :return: the sequence of names
+        """
+        return ()
+
     @staticmethod
     @abstractmethod
     def collection_name() -> str:
@@ -86,11 +104,12 @@ class Dataset(ABC):
 
     @staticmethod
     @abstractmethod
-    def from_sequence(entities: list[list[Entity]]) -> Dataset:
+    def from_sequence(entities: list[list[Entity]], strings: StringPool = None) -> Dataset:
         """
         Returns an instance from a sequence of entity lists.
 
         :param entities: the entities
+        :param strings: the pool which has interned the strings of the entities as they were read, if any
         :return: the instance
         """
         pass
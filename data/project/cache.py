@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from stat import S_IWGRP, S_IWOTH
+from typing import Callable, Type
+
+from data.project.base import Dataset
+
+VERSION = 2
+
+
+class DatasetCache:
+    """
+    An on-disk cache of parsed datasets. An entry is keyed by the format, the type of the dataset and the paths, sizes
+    and modification times of the input files, so a modified input is parsed again. The datasets are stored pickled
+    (with the highest protocol), and the least recently used entries are evicted when the cache exceeds its size.
+
+    Unpickling can run arbitrary code, so the directory has to be private: it is created accessible by its owner only,
+    and the cache refuses to use a directory (or to load an entry) which belongs to another user or which other users
+    can write.
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = 1 << 30):
+        """
+        Creates a cache. Nothing is read or written here.
+
+        :param directory: the directory of the entries, $DATA_PROJECT_CACHE or ~/.cache/data-project by default
+        :param max_bytes: the maximal total size of the entries
+        """
+        assert max_bytes > 0
+
+        self.directory = directory if directory is not None else os.environ.get(
+            "DATA_PROJECT_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "data-project"))
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(format_name: str, path: str, dataset_type: Type[Dataset]) -> str:
+        """
+        Returns the key of a dataset: a hash of the format, the type and the metadata of the input files (the file
+        itself, or the files in the folder).
+
+        :param format_name: the name of the format
+        :param path: the path of the input (a file or a folder)
+        :param dataset_type: the type of the dataset
+        :return: the key
+        """
+        path = os.path.abspath(path)
+        names = sorted(os.listdir(path)) if os.path.isdir(path) else [""]
+        digest = hashlib.sha256(f"{VERSION}\0{format_name}\0{dataset_type.__module__}.{dataset_type.__qualname__}"
+                                .encode("utf-8"))
+        for name in names:
+            file_path = os.path.join(path, name) if name else path
+            if os.path.isfile(file_path):
+                stat = os.stat(file_path)
+                digest.update(f"\0{file_path}\0{stat.st_size}\0{stat.st_mtime_ns}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pickle")
+
+    @staticmethod
+    def _check_owner(path: str, status: os.stat_result) -> None:
+        """
+        Checks that a file or directory of the cache belongs to the current user and that other users cannot write it
+        (there are no such owners on Windows, where nothing is checked).
+
+        :param path: the path of the file or directory
+        :param status: the status of the file or directory
+        :return: nothing
+        """
+        if hasattr(os, "getuid") and (status.st_uid != os.getuid() or status.st_mode & (S_IWGRP | S_IWOTH)):
+            raise PermissionError(f"{path} is not private to the current user, it cannot be used as a cache")
+
+    def get(self, key: str) -> Dataset | None:
+        """
+        Returns a cached dataset, and marks it as recently used. PermissionError is raised if the directory is not
+        private, an entry which is not private is not loaded (it is treated as a missing one).
+
+        :param key: the key of the dataset
+        :return: the dataset, or None if it is not cached
+        """
+        entry = self._entry(key)
+        if not os.path.isdir(self.directory):
+            return None
+        DatasetCache._check_owner(self.directory, os.stat(self.directory))
+        try:
+            with open(entry, "rb") as file:
+                DatasetCache._check_owner(entry, os.fstat(file.fileno()))
+                dataset = pickle.load(file)
+            os.utime(entry)
+            return dataset
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def put(self, key: str, dataset: Dataset) -> None:
+        """
+        Stores a dataset, then evicts the least recently used entries if the cache has become too large. The directory
+        is created if it does not exist, PermissionError is raised if it is not private.
+
+        :param key: the key of the dataset
+        :param dataset: the dataset
+        :return: nothing
+        """
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        DatasetCache._check_owner(self.directory, os.stat(self.directory))
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                pickle.dump(dataset, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._entry(key))
+        except BaseException:
+            os.remove(temporary)
+            raise
+        self.evict()
+
+    def read_dataset(self, format_name: str, path: str, dataset_type: Type[Dataset],
+                     read: Callable[[], Dataset]) -> Dataset:
+        """
+        Returns the cached instance of a dataset, or reads and caches it if the input is not cached or has changed. If
+        the directory is not private, a warning is logged and the dataset is read without the cache.
+
+        :param format_name: the name of the format
+        :param path: the path of the input (a file or a folder)
+        :param dataset_type: the type of the dataset
+        :param read: the function which reads the dataset
+        :return: the dataset
+        """
+        key = DatasetCache.key(format_name, path, dataset_type)
+        try:
+            dataset = self.get(key)
+        except PermissionError as error:
+            logging.getLogger(__name__).warning("%s (the dataset is read directly)", error)
+            return read()
+        if dataset is None:
+            dataset = read()
+            try:
+                self.put(key, dataset)
+            except PermissionError as error:
+                logging.getLogger(__name__).warning("%s (the dataset is not stored)", error)
+        return dataset
+
+    def entries(self) -> list[tuple[str, int, float]]:
+        """
+        Returns the entries of the cache, the least recently used one first.
+
+        :return: the list of (path, size, time of last use) triples
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pickle"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((os.path.join(self.directory, name), stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def size(self) -> int:
+        """
+        Returns the total size of the entries.
+
+        :return: the size in bytes
+        """
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> int:
+        """
+        Removes the least recently used entries until the cache fits into its size.
+
+        :return: the number of removed entries
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for entry, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(entry)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        """
+        Removes every entry.
+
+        :return: the number of removed entries
+        """
+        entries = self.entries()
+        for entry, _, _ in entries:
+            os.remove(entry)
+        return len(entries)
@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+from collections.abc import Sequence, Mapping
+from functools import partial
+from typing import Type, Iterable, Iterator, Union, Callable
+
+import numpy as np
+
+from data.project.base import Dataset, Entity
+from data.project.interning import StringPool
+from data.project.model import CompanyDataset, Person, Job, Company
+
+
+class StringColumn(Sequence):
+    """
+    A dictionary-encoded column of strings: every distinct value is stored once (in the list of categories), and the
+    rows only hold the integer codes of their values.
+    """
+
+    __slots__ = ("codes", "categories")
+
+    def __init__(self, codes: np.ndarray, categories: list[str]):
+        self.codes = codes
+        self.categories = categories
+
+    @staticmethod
+    def encode(values: Iterable[str]) -> StringColumn:
+        """
+        Encodes a sequence of strings.
+
+        :param values: the values
+        :return: the column
+        """
+        index = {}
+        codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int32)
+        return StringColumn(codes, list(index))
+
+    def decode(self, start: int = None, stop: int = None) -> list[str]:
+        """
+        Returns the values of a range of rows.
+
+        :param start: the first row
+        :param stop: the row after the last one
+        :return: the list of values
+        """
+        categories = self.categories
+        return [categories[code] for code in self.codes[start:stop].tolist()]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return StringColumn(self.codes[index], self.categories)
+        return self.categories[self.codes[index]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.decode())
+
+
+class PackedStringColumn(Sequence):
+    """
+    A column of strings packed into a single UTF-8 buffer: every value is followed by a NUL character, and the offsets
+    tell where the values start (with the length of the buffer at the end). Both parts are plain NumPy arrays, so the
+    column can be memory-mapped from files without copying.
+    """
+
+    __slots__ = ("data", "offsets")
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    @staticmethod
+    def encode(values: Iterable[str]) -> PackedStringColumn:
+        """
+        Packs a sequence of strings. The strings must not contain NUL characters.
+
+        :param values: the values
+        :return: the column
+        """
+        encoded = [value.encode("utf-8") + b"\0" for value in values]
+        if any(b"\0" in value[:-1] for value in encoded):
+            raise ValueError("packed strings must not contain NUL characters")
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return PackedStringColumn(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def decode(self, start: int = None, stop: int = None) -> list[str]:
+        """
+        Returns the values of a range of rows.
+
+        :param start: the first row
+        :param stop: the row after the last one
+        :return: the list of values
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        if start >= stop:
+            return []
+        return self.data[self.offsets[start]:self.offsets[stop]].tobytes().decode("utf-8").split("\0")[:-1]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return PackedStringColumn.encode(self.decode()[index])
+            stop = max(start, stop)
+            offsets = self.offsets[start:stop + 1]
+            return PackedStringColumn(self.data[offsets[0]:offsets[-1]], offsets - offsets[0])
+        if index < 0:
+            index += len(self)
+        return self.decode(index, index + 1)[0]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.decode())
+
+
+Column = Union[np.ndarray, StringColumn, PackedStringColumn]
+
+CATEGORY = "category"
+
+_SCHEMA: dict[Type[Entity], dict[str, object]] = {
+    Person: {"id": object, "name": object, "age": np.int16, "male": np.bool_, "job_name": CATEGORY,
+             "company_name": CATEGORY},
+    Job: {"name": object, "salary": np.int32, "pay_grade": np.int8},
+    Company: {"name": object, "address": object, "motto": object, "country": CATEGORY},
+}
+
+
+def _to_column(values: Iterable, dtype: object) -> Column:
+    """
+    Converts values to a column of the given type.
+
+    :param values: the values
+    :param dtype: the NumPy type of the column, or CATEGORY for dictionary-encoded strings
+    :return: the column
+    """
+    if dtype == CATEGORY:
+        return values if isinstance(values, StringColumn) else StringColumn.encode(values)
+    if dtype is object:
+        if isinstance(values, PackedStringColumn):
+            return values
+        values = values if isinstance(values, (list, np.ndarray)) else list(values)
+        column = np.empty(len(values), dtype=object)
+        column[:] = values
+        return column
+    return np.asarray(values, dtype=dtype)
+
+
+def _to_list(column: Column, start: int = None, stop: int = None) -> list:
+    """
+    Returns the values of a range of rows as Python objects.
+
+    :param column: the column
+    :param start: the first row
+    :param stop: the row after the last one
+    :return: the list of values
+    """
+    if isinstance(column, (StringColumn, PackedStringColumn)):
+        return column.decode(start, stop)
+    return column[start:stop].tolist()
+
+
+class LazyColumns(Mapping):
+    """
+    A mapping of the columns of an entity type which are loaded on first access, so a query only reads the fields it
+    uses.
+    """
+
+    def __init__(self, load: Callable[[str], Iterable], schema: dict[str, object]):
+        self._load = load
+        self._schema = schema
+        self._columns = {}
+
+    def loaded(self) -> list[str]:
+        """
+        Returns the names of the columns which have been loaded.
+
+        :return: the list of names
+        """
+        return list(self._columns)
+
+    def __getitem__(self, name: str) -> Column:
+        if name not in self._columns:
+            if name not in self._schema:
+                raise KeyError(name)
+            self._columns[name] = _to_column(self._load(name), self._schema[name])
+        return self._columns[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._schema)
+
+    def __len__(self) -> int:
+        return len(self._schema)
+
+
+class EntityView(Sequence):
+    """
+    A read-only sequence of entities which are created on demand from the columns of a columnar dataset.
+    """
+
+    batch_size = 65536
+
+    def __init__(self, entity_type: Type[Entity], columns: dict[str, Column]):
+        self.entity_type = entity_type
+        self.columns = [columns[name] for name in entity_type.field_names()]
+
+    def __len__(self) -> int:
+        return len(self.columns[0])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.entity_type(*values) for values in
+                    zip(*[_to_list(column[index]) for column in self.columns])]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("entity index out of range")
+        return self.entity_type(*[_to_list(column, index, index + 1)[0] for column in self.columns])
+
+    def __iter__(self) -> Iterator[Entity]:
+        for start in range(0, len(self), self.batch_size):
+            stop = start + self.batch_size
+            for values in zip(*[_to_list(column, start, stop) for column in self.columns]):
+                yield self.entity_type(*values)
+
+
+class ColumnarCompanyDataset(Dataset):
+    """
+    A column-oriented representation of CompanyDataset. The numeric fields are stored in NumPy arrays, the frequently
+    repeated strings (the company and job names of people and the countries of companies) are dictionary-encoded, and
+    the rest of the strings are stored in object arrays. Entities are only created when they are accessed.
+    """
+
+    def __init__(self, columns: dict[Type[Entity], dict[str, Column]]):
+        self.columns = {
+            entity_type: columns[entity_type] if isinstance(columns[entity_type], LazyColumns) else
+            {name: _to_column(columns[entity_type][name], dtype) for name, dtype in schema.items()}
+            for entity_type, schema in _SCHEMA.items()
+        }
+        self._indexes = {}
+
+    @staticmethod
+    def entity_types() -> list[Type[Entity]]:
+        return CompanyDataset.entity_types()
+
+    @staticmethod
+    def from_sequence(entities: list[list[Entity]], strings: StringPool = None) -> Dataset:
+        # the strings are dictionary-encoded by the columns, so they are not interned first
+        return ColumnarCompanyDataset.from_objects(CompanyDataset(*entities))
+
+    @staticmethod
+    def from_objects(dataset: Dataset) -> ColumnarCompanyDataset:
+        """
+        Converts a dataset of objects to columnar form.
+
+        :param dataset: the dataset
+        :return: the instance
+        """
+        entities = dataset.entities()
+        return ColumnarCompanyDataset({
+            entity_type: {name: [getattr(entity, name) for entity in entities[entity_type]] for name in schema}
+            for entity_type, schema in _SCHEMA.items()
+        })
+
+    @staticmethod
+    def lazy(load: Callable[[Type[Entity], str], Iterable]) -> ColumnarCompanyDataset:
+        """
+        Creates a dataset whose columns are loaded on first access.
+
+        :param load: the function which returns the values of a column (by the type of entities and the field name)
+        :return: the instance
+        """
+        return ColumnarCompanyDataset({
+            entity_type: LazyColumns(partial(load, entity_type), schema) for entity_type, schema in _SCHEMA.items()
+        })
+
+    def to_objects(self) -> CompanyDataset:
+        """
+        Converts the dataset to a dataset of objects.
+
+        :return: the instance
+        """
+        return CompanyDataset(*[list(self.view(entity_type)) for entity_type in self.entity_types()])
+
+    def view(self, entity_type: Type[Entity]) -> EntityView:
+        """
+        Returns the entities of a type.
+
+        :param entity_type: the type
+        :return: the sequence of entities
+        """
+        return EntityView(entity_type, self.columns[entity_type])
+
+    def column(self, entity_type: Type[Entity], name: str) -> Column:
+        """
+        Returns a column.
+
+        :param entity_type: the type of entities
+        :param name: the name of the field
+        :return: the column
+        """
+        return self.columns[entity_type][name]
+
+    def entities(self) -> dict[Type[Entity], list[Entity]]:
+        return {entity_type: self.view(entity_type) for entity_type in self.entity_types()}
+
+    def index(self, entity_type: Type[Entity]) -> dict[object, Entity]:
+        """
+        Returns the primary key index of a type: the dictionary of entities by their primary keys. It is built on first
+        use (the columns are not expected to be modified).
+
+        :param entity_type: the type of entities
+        :return: the index
+        """
+        key = ("primary", entity_type)
+        if key not in self._indexes:
+            keys = _to_list(self.column(entity_type, entity_type.field_names()[0]))
+            self._indexes[key] = dict(zip(keys, self.view(entity_type)))
+        return self._indexes[key]
+
+    def foreign_index(self, entity_type: Type[Entity], field_name: str) -> dict[object, list[int]]:
+        """
+        Returns a foreign key index of a type: the positions of entities by the values of a field. It is built on first
+        use.
+
+        :param entity_type: the type of entities
+        :param field_name: the name of the field
+        :return: the index
+        """
+        key = ("foreign", entity_type, field_name)
+        if key not in self._indexes:
+            index = {}
+            for i, value in enumerate(_to_list(self.column(entity_type, field_name))):
+                index.setdefault(value, []).append(i)
+            self._indexes[key] = index
+        return self._indexes[key]
+
+    @property
+    def people(self) -> EntityView:
+        return self.view(Person)
+
+    @property
+    def jobs(self) -> EntityView:
+        return self.view(Job)
+
+    @property
+    def companies(self) -> EntityView:
+        return self.view(Company)
+
+    @staticmethod
+    def generate(count_of_employees: int, count_of_jobs: int, count_of_companies: int, **kwargs):
+        """
+        Generates a dataset in columnar form without creating any entities (see CompanyDataset.generate_columns).
+
+        :param count_of_employees: the number of people
+        :param count_of_jobs: the number of jobs
+        :param count_of_companies: the number of companies
+        :param kwargs: the further parameters of CompanyDataset.generate_columns
+        :return: the instance
+        """
+        return ColumnarCompanyDataset(
+            CompanyDataset.generate_columns(count_of_employees, count_of_jobs, count_of_companies, **kwargs))
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import importlib
+import os
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from typing import Any, Protocol, Type, runtime_checkable
+
+from data.project.base import Dataset
+
+
+@runtime_checkable
+class FormatHandler(Protocol):
+    """
+    The common interface of the handlers of dataset formats. The location is a path for file formats and a connection
+    (or a pool of connections) for databases.
+    """
+
+    @staticmethod
+    def read_dataset(dataset_type: Type[Dataset], location: Any) -> Dataset:
+        ...
+
+    @staticmethod
+    def write_dataset(dataset: Dataset, location: Any) -> Any:
+        ...
+
+
+@dataclass(frozen=True)
+class Format:
+    """
+    A registered format.
+    """
+
+    name: str
+    target: str
+    patterns: tuple[str, ...] = field(default=())
+    database: bool = False
+
+
+COMPRESSIONS = (".gz", ".bz2", ".xz", ".zst", ".lz4")
+"""The extensions of the compressions of text documents, which follow the extension of the format (e.g. .csv.gz)."""
+
+_formats: dict[str, Format] = {}
+_loaded: dict[str, FormatHandler] = {}
+
+
+def register_format(name: str, target: str, patterns: tuple[str, ...] = (), database: bool = False) -> None:
+    """
+    Registers a format. The handler is given by its import path, so neither it nor its dependencies are imported
+    until the format is first selected.
+
+    :param name: the name of the format
+    :param target: the import path of the handler, in the form "package.module:attribute"
+    :param patterns: the file name patterns used by detect_format; formats registered earlier are tried first
+    :param database: tells whether the location of the format is a database connection instead of a path
+    :return: nothing
+    """
+    _formats[name] = Format(name, target, tuple(patterns), database)
+    _loaded.pop(name, None)
+
+
+def format_names() -> list[str]:
+    """
+    Returns the names of the registered formats.
+
+    :return: the list of names
+    """
+    return list(_formats)
+
+
+def is_database(name: str) -> bool:
+    """
+    Tells whether the location of a format is a database connection.
+
+    :param name: the name of the format
+    :return: the result
+    """
+    return _format(name).database
+
+
+def get_format(name: str) -> FormatHandler:
+    """
+    Returns the handler of a format, imports it on first use.
+
+    :param name: the name of the format
+    :return: the handler
+    """
+    if name not in _loaded:
+        module, _, attribute = _format(name).target.partition(":")
+        handler = getattr(importlib.import_module(module), attribute)
+        if not isinstance(handler, FormatHandler):
+            raise TypeError(f"the handler of {name} does not implement FormatHandler")
+        _loaded[name] = handler
+    return _loaded[name]
+
+
+def detect_format(path: str) -> str:
+    """
+    Detects the format of a dataset from its path. Files are matched by their names, folders by the names of the files
+    in them.
+
+    :param path: the path of a file or a folder
+    :return: the name of the format
+    """
+    names = os.listdir(path) if os.path.isdir(path) else [os.path.basename(path)]
+    for dataset_format in _formats.values():
+        if any(fnmatch(name, pattern) for name in names for pattern in dataset_format.patterns):
+            return dataset_format.name
+    raise ValueError(f"the format of {path} cannot be detected")
+
+
+def _compressed(pattern: str) -> tuple[str, ...]:
+    return tuple(pattern + compression for compression in COMPRESSIONS)
+
+
+def _format(name: str) -> Format:
+    if name not in _formats:
+        raise ValueError(f"unknown format: {name}")
+    return _formats[name]
+
+
+register_format("snapshot", "data.project.snapshot:SnapshotHandler", ("snapshot.json",))
+register_format("csv", "data.project.handler:CSVHandler", ("*.csv", *_compressed("*.csv")))
+register_format("jsonl", "data.project.handler:JSONLinesHandler", ("*.jsonl", *_compressed("*.jsonl")))
+register_format("json", "data.project.handler:JSONHandler", ("*.json", *_compressed("*.json")))
+register_format("parquet", "data.project.handler:ParquetHandler", ("*.parquet",))
+register_format("xlsx", "data.project.handler:XLSXHandler", ("dataset.xlsx",))
+register_format("sqlite", "data.project.handler:SQLHandler", ("*.db", "*.sqlite", "*.sqlite3"), database=True)
+register_format("mysql", "data.project.handler:SQLHandler", database=True)
@@ -1,13 +1,249 @@
+from __future__ import annotations
+
 import csv
+import io
 import json
+import logging
+import mmap
 import os
-from typing import Type
-
-import openpyxl
-from mysql.connector import MySQLConnection
-from openpyxl import Workbook
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from functools import partial
+from itertools import chain, islice
+from operator import itemgetter
+from typing import Type, Iterable, Iterator, Sequence, Callable, Any, IO, TYPE_CHECKING
 
 from data.project.base import Entity, Dataset
+from data.project.formats import COMPRESSIONS
+from data.project.instrumentation import enabled as instrumented, stage, timed, timed_iterator, add
+from data.project.interning import StringPool, string_pool
+from data.project.pool import ConnectionPool
+
+if TYPE_CHECKING:
+    import openpyxl
+    import pyarrow
+    from mysql.connector import MySQLConnection
+    from mysql.connector.cursor import MySQLCursor
+
+
+def _compression(file_path: str) -> str | None:
+    """
+    Returns the compression of a document, by its extension.
+
+    :param file_path: the path of the document
+    :return: the extension of the compression (one of COMPRESSIONS), or None if it is not compressed
+    """
+    suffix = os.path.splitext(file_path)[1].lower()
+    return suffix if suffix in COMPRESSIONS else None
+
+
+def _open(file_path: str, mode: str, newline: str = None, compression_level: int = None) -> IO[str]:
+    """
+    Opens a text document (in UTF-8), which is compressed by gzip (.gz), bzip2 (.bz2), xz (.xz), Zstandard (.zst) or
+    LZ4 (.lz4) if its extension says so. The content is compressed and decompressed as a stream. Zstandard and LZ4
+    need the optional zstandard and lz4 packages.
+
+    :param file_path: the path of the document
+    :param mode: "r", "w" or "a"
+    :param newline: the newline mode of the text stream
+    :param compression_level: the level of the compression when writing, the default of the codec when it is omitted
+    :return: the text stream
+    """
+    compression = _compression(file_path)
+    if compression is None:
+        return open(file_path, mode, newline=newline, encoding="utf-8")
+
+    writing = mode != "r"
+    text_mode = mode + "t"
+    if compression == ".gz":
+        import gzip
+
+        return gzip.open(file_path, text_mode, compresslevel=compression_level if compression_level is not None else 6,
+                         encoding="utf-8", newline=newline)
+    if compression == ".bz2":
+        import bz2
+
+        return bz2.open(file_path, text_mode, compresslevel=compression_level if compression_level is not None else 9,
+                        encoding="utf-8", newline=newline)
+    if compression == ".xz":
+        import lzma
+
+        return lzma.open(file_path, text_mode, preset=compression_level if writing else None, encoding="utf-8",
+                         newline=newline)
+    if compression == ".zst":
+        import zstandard
+
+        context = zstandard.ZstdCompressor(level=compression_level if compression_level is not None else 3)
+        return zstandard.open(file_path, text_mode, cctx=context if writing else None, encoding="utf-8",
+                              newline=newline)
+
+    import lz4.frame
+
+    return lz4.frame.open(file_path, text_mode, compression_level=compression_level or 0, encoding="utf-8",
+                          newline=newline)
+
+
+def _find_extension(path: str, file_name: str, extension: str) -> str:
+    """
+    Returns the extension of an existing document: the given one, or the given one followed by a compression (e.g.
+    .csv.gz) if only such a document exists.
+
+    :param path: the path of the document
+    :param file_name: the name of the document
+    :param extension: the extension of the uncompressed document
+    :return: the extension
+    """
+    for candidate in (extension, *[extension + compression for compression in COMPRESSIONS]):
+        if os.path.exists(os.path.join(path, file_name + candidate)):
+            return candidate
+    return extension
+
+
+def _worker_pool(strings: StringPool | None) -> StringPool | None:
+    # entities parsed in another process are interned with a pool of their own, the dataset interns them again
+    return StringPool() if strings is not None else None
+
+
+def _getter(keys: Sequence) -> Callable[[Any], tuple]:
+    """
+    Returns a function which picks the given keys (or indices) of a row, in the given order.
+
+    :param keys: the keys
+    :return: the function
+    """
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda row: (row[key],)
+    return itemgetter(*keys)
+
+
+def _row_getter(header: list[str], field_names: Sequence[str]) -> Callable[[list], Sequence]:
+    """
+    Returns a function which orders the values of a row (of a document with the given header) by the field names. If
+    the header starts with the field names, the rows can be passed on without rearrangement.
+
+    :param header: the header of the document
+    :param field_names: the field names of the entity type
+    :return: the function
+    """
+    if header[:len(field_names)] == list(field_names):
+        return lambda row: row
+    return _getter([header.index(name) for name in field_names])
+
+
+def _map_collections(function: Callable[[Type[Entity]], Any], entity_types: Sequence[Type[Entity]],
+                     workers: int = 1) -> list:
+    """
+    Applies a function to entity types, concurrently in a pool of threads when more than one worker is requested. The
+    collections are stored separately, so they can be read or written independently.
+
+    :param function: the function
+    :param entity_types: the entity types
+    :param workers: the number of threads (None means one for each entity type)
+    :return: the results in the order of the entity types
+    """
+    if workers is not None and workers <= 1:
+        return [function(entity_type) for entity_type in entity_types]
+    with ThreadPoolExecutor(max_workers=workers or len(entity_types)) as executor:
+        return list(executor.map(function, entity_types))
+
+
+def _dirty_entities(dataset: Dataset, entity_type: Type[Entity]) -> list[Entity]:
+    """
+    Returns the entities of a type which have to be written since the last write of a dataset with change tracking
+    (see CompanyDataset.changes): all of them when the collection was replaced, the added and modified ones otherwise.
+
+    :param dataset: the dataset instance
+    :param entity_type: the type of entities
+    :return: the list of entities
+    """
+    change_set = dataset.changes(entity_type)
+    if change_set.replaced:
+        return list(dataset.entities()[entity_type])
+    index = dataset.index(entity_type)
+    return [index[key] for key in change_set.dirty() if key in index]
+
+
+def _write_changes(dataset: Dataset, path: str, extension: str,
+                   write: Callable[[Iterable[Entity], Type[Entity], bool], Any], clear: bool = True) -> dict[str, str]:
+    """
+    Writes the changes of a dataset with change tracking to documents which store one collection each. Collections
+    without changes are skipped. If entities have only been added to a collection (and its document exists), they are
+    appended to the document when the format allows it, otherwise the whole document of the collection is rewritten:
+    a single modified or deleted entity costs as much as writing the collection.
+
+    :param dataset: the dataset instance
+    :param path: the path of the documents
+    :param extension: the extension of the documents
+    :param write: the function which writes entries of a type, appending them to the document or replacing it
+    :param clear: tells whether the changes should be cleared afterwards
+    :return: the performed operations ("append" or "rewrite") by the names of the changed collections
+    """
+    operations = {}
+    for entity_type in dataset.entity_types():
+        change_set = dataset.changes(entity_type)
+        if not change_set:
+            continue
+        file_name = entity_type.collection_name()
+        appendable = not (change_set.modified or change_set.deleted or change_set.replaced)
+        if appendable and os.path.exists(os.path.join(path, file_name + extension)) and \
+                write(_dirty_entities(dataset, entity_type), entity_type, True) is not NotImplemented:
+            operations[file_name] = "append"
+        else:
+            write(dataset.entities()[entity_type], entity_type, False)
+            operations[file_name] = "rewrite"
+    if clear:
+        dataset.clear_changes()
+    return operations
+
+
+def _record_boundary(buffer: mmap.mmap, start: int, position: int) -> int:
+    """
+    Finds the first record boundary of a CSV document at or after a position: the end of the first line break which is
+    not inside a quoted field. Quotes are escaped by doubling them, so a field is open exactly when an odd number of
+    quotes have been seen since the start of the record.
+
+    :param buffer: the content of the document
+    :param start: the start of a record, at or before the position
+    :param position: the position
+    :return: the boundary (the length of the document if there is no boundary after the position)
+    """
+    if position <= start:
+        position = start
+    quotes = buffer[start:position].count(b'"')
+    while True:
+        line_break = buffer.find(b"\n", position)
+        if line_break < 0:
+            return len(buffer)
+        quotes += buffer[position:line_break].count(b'"')
+        position = line_break + 1
+        if quotes % 2 == 0:
+            return position
+
+
+def _parse_csv_range(entity_type: Type[Entity], file_path: str, header: list[str], start: int, stop: int,
+                     delimiter: str, strings: StringPool = None) -> list[Entity]:
+    """
+    Parses the records of a byte range of a CSV document (it runs in a worker process).
+
+    :param entity_type: the type of entries
+    :param file_path: the path of the document
+    :param header: the header of the document
+    :param start: the start of the range (a record boundary)
+    :param stop: the end of the range (a record boundary)
+    :param delimiter: the delimiter
+    :param strings: the pool which interns the repeated strings of the entries
+    :return: the list of elements
+    """
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        text = file.read(stop - start).decode("utf-8")
+    getter = _row_getter(header, entity_type.field_names())
+    from_sequence = entity_type.from_sequence
+    return [from_sequence(getter(row), strings)
+            for row in csv.reader(io.StringIO(text, newline=""), delimiter=delimiter)]
 
 
 class CSVHandler:
@@ -16,76 +252,273 @@ class CSVHandler:
     """
 
     @staticmethod
-    def read_entity(entity_type: Type[Entity], path: str, file_name: str = None,
-                    extension: str = ".csv", delimiter: str = ";") -> list[Entity]:
+    @timed("csv.read")
+    def iter_entity(entity_type: Type[Entity], path: str, file_name: str = None,
+                    extension: str = ".csv", delimiter: str = ";", batch_size: int = None,
+                    strings: StringPool = None) -> Iterator[Entity] | Iterator[list[Entity]]:
         """
-        Reads entries from a CSV document.
+        Lazily reads entries from a CSV document. The rows are parsed one by one while the result is being consumed,
+        so the whole document never has to fit into the memory.
 
         :param entity_type: the type of entries
         :param path: the path of the document
         :param file_name: the name of the document
         :param extension: the extension of the document
         :param delimiter: the delimiter
-        :return: the list of elements
+        :param batch_size: if it is given, lists of (at most) this many elements are yielded instead of single elements
+        :param strings: the pool which interns the repeated strings of the entries as they are read (see
+            Entity.from_sequence)
+        :return: the iterator of elements (or batches)
         """
         file_name = file_name if file_name is not None else entity_type.collection_name()
         extension = extension if extension is not None else ".csv"
         delimiter = delimiter if delimiter is not None else ";"
+        assert batch_size is None or batch_size > 0
+
+        file_path = os.path.join(path, file_name + extension)
+        with _open(file_path, "r", newline="") as file:
+            rows = csv.reader(file, delimiter=delimiter)
+            if instrumented():
+                add("csv.read", "bytes", os.path.getsize(file_path))
+                rows = timed_iterator("csv.parse", rows)
+            header = next(rows, None)
+            if header is None:  # an empty document has no header (and no entries)
+                return
+            getter = _row_getter(header, entity_type.field_names())
+            from_sequence = entity_type.from_sequence
+            entities = (from_sequence(getter(row), strings) for row in rows)
+            if batch_size is None:
+                yield from entities
+            else:
+                while batch := list(islice(entities, batch_size)):
+                    yield batch
+
+    @staticmethod
+    def read_entity(entity_type: Type[Entity], path: str, file_name: str = None,
+                    extension: str = ".csv", delimiter: str = ";", strings: StringPool = None) -> list[Entity]:
+        """
+        Reads entries from a CSV document.
 
-        with open(os.path.join(path, file_name + extension), "r", encoding="utf-8") as file:
-            rows = csv.DictReader(file, delimiter=delimiter)
-            return [entity_type.from_sequence([row[n] for n in entity_type.field_names()]) for row in rows]
+        :param entity_type: the type of entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param delimiter: the delimiter
+        :param strings: the pool which interns the repeated strings of the entries as they are read (see
+            Entity.from_sequence)
+        :return: the list of elements
+        """
+        return list(CSVHandler.iter_entity(entity_type, path, file_name=file_name, extension=extension,
+                                           delimiter=delimiter, strings=strings))
 
     @staticmethod
-    def write_entity(entities: list[Entity], path: str, file_name: str = None,
-                     extension: str = ".csv", delimiter: str = ";") -> None:
+    def split_entity(path: str, file_name: str, extension: str = ".csv", parts: int = 2,
+                     min_size: int = 1 << 20) -> tuple[str, list[tuple[int, int]]]:
         """
-        Writes entries to a CSV document.
+        Splits a CSV document into byte ranges of about the same size, at record boundaries. Line breaks inside quoted
+        fields (e.g. in addresses) are not boundaries.
+
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param parts: the number of ranges
+        :param min_size: the minimal size of a range in bytes, smaller documents are split into fewer ranges
+        :return: the raw header line and the list of (start, stop) ranges
+        """
+        with open(os.path.join(path, file_name + extension), "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return "", []
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                start = _record_boundary(buffer, 0, 0)
+                header = buffer[:start].decode("utf-8")
+                parts = max(1, min(parts, (len(buffer) - start) // min_size))
+                size = (len(buffer) - start) / parts
+                boundaries = [start]
+                for i in range(1, parts):
+                    boundaries.append(_record_boundary(buffer, boundaries[-1], start + round(i * size)))
+                boundaries.append(len(buffer))
+        ranges = [(begin, end) for begin, end in zip(boundaries, boundaries[1:]) if begin < end]
+        return header, ranges
+
+    @staticmethod
+    @timed("csv.read_parallel")
+    def read_entity_parallel(entity_type: Type[Entity], path: str, file_name: str = None, extension: str = ".csv",
+                             delimiter: str = ";", workers: int = None, executor: Executor = None,
+                             strings: StringPool = None) -> list[Entity]:
+        """
+        Reads entries from a CSV document, parsing byte ranges of it in parallel in worker processes.
+
+        :param entity_type: the type of entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param delimiter: the delimiter
+        :param workers: the number of ranges (and processes), the number of processors when it is omitted
+        :param executor: the executor of the parsing, a new pool of processes is created when it is omitted
+        :param strings: the pool which interns the repeated strings of the entries (the worker processes intern them
+            with pools of their own, then they are interned again with this one)
+        :return: the list of elements
+        """
+        file_name = file_name if file_name is not None else entity_type.collection_name()
+        workers = workers if workers is not None else os.cpu_count() or 1
+
+        header, ranges = "", []
+        if _compression(extension) is None:  # compressed documents cannot be split
+            header, ranges = CSVHandler.split_entity(path, file_name, extension=extension, parts=workers)
+        if len(ranges) <= 1:
+            return CSVHandler.read_entity(entity_type, path, file_name=file_name, extension=extension,
+                                          delimiter=delimiter, strings=strings)
+
+        header = next(csv.reader(io.StringIO(header, newline=""), delimiter=delimiter))
+        parse = partial(_parse_csv_range, entity_type, os.path.join(path, file_name + extension), header,
+                        delimiter=delimiter, strings=_worker_pool(strings))
+        if executor is None:
+            with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+                entities = list(chain.from_iterable(executor.map(parse, *zip(*ranges))))
+        else:
+            entities = list(chain.from_iterable(executor.map(parse, *zip(*ranges))))
+        if strings is not None:
+            strings.intern_entities(entity_type, entities)
+        return entities
+
+    @staticmethod
+    @timed("csv.write")
+    def write_entity(entities: Iterable[Entity], path: str, file_name: str = None,
+                     extension: str = ".csv", delimiter: str = ";", entity_type: Type[Entity] = None,
+                     append: bool = False, compression_level: int = None) -> int:
+        """
+        Writes entries to a CSV document. The entries can be given by any iterable (e.g. a generator), they are
+        streamed to the document one by one.
 
         :param entities: the entries
         :param path: the path of the document
         :param file_name: the name of the document
         :param extension: the extension of the document
         :param delimiter: the delimiter
-        :return: nothing
+        :param entity_type: the type of entries, it is needed only when the iterable can be empty
+        :param append: tells whether the entries should be appended to the document (the header is only written to
+            a new or empty document)
+        :param compression_level: the level of the compression if the extension selects one (e.g. .csv.gz)
+        :return: the number of written entries
         """
-        file_name = file_name if file_name is not None else entities[0].collection_name()
+        entities = iter(entities)
+        first = next(entities, None)
+        if first is None and entity_type is None:
+            raise ValueError("the type of entries cannot be determined from an empty iterable")
+        entity_type = entity_type if entity_type is not None else type(first)
+
+        file_name = file_name if file_name is not None else entity_type.collection_name()
         extension = extension if extension is not None else ".csv"
         delimiter = delimiter if delimiter is not None else ";"
 
-        with open(os.path.join(path, file_name + extension), "w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=entities[0].field_names(), delimiter=delimiter)
-            writer.writeheader()
-            for entity in entities:
-                writer.writerow(entity.__dict__)
+        count = 0
+        file_path = os.path.join(path, file_name + extension)
+        heading = not (append and os.path.exists(file_path) and os.path.getsize(file_path) > 0)
+        with _open(file_path, "a" if append else "w", newline="", compression_level=compression_level) as file:
+            writer = csv.writer(file, delimiter=delimiter)
+            if heading:
+                writer.writerow(entity_type.field_names())
+            if first is not None:
+                for entity in chain((first,), entities):
+                    writer.writerow(entity.to_sequence())
+                    count += 1
+        if instrumented():
+            add("csv.write", "rows", count)
+            add("csv.write", "bytes", os.path.getsize(file_path))
+        return count
 
     @staticmethod
-    def read_dataset(dataset_type: Type[Dataset], path: str) -> Dataset:
+    def iter_dataset(dataset_type: Type[Dataset], path: str, batch_size: int = None, extension: str = None,
+                     strings: StringPool = None
+                     ) -> Iterator[tuple[Type[Entity], Iterator[Entity] | Iterator[list[Entity]]]]:
         """
-        Reads a dataset from multiple CSV documents.
+        Lazily reads a dataset from multiple CSV documents. Each entity type is paired with the lazy iterator of its
+        entries, so the documents can be processed one by one in constant memory.
 
         :param dataset_type: the type of the dataset
         :param path: the path of the documents
+        :param batch_size: if it is given, batches of entries are yielded by the inner iterators
+        :param extension: the extension of the documents (e.g. .csv.gz), by default .csv or a compressed variant of it
+            which exists
+        :param strings: the pool which interns the repeated strings of the entries as they are read (see
+            Entity.from_sequence)
+        :return: the iterator of (type, entries) pairs
+        """
+        for entity_type in dataset_type.entity_types():
+            file_name = entity_type.collection_name()
+            yield entity_type, CSVHandler.iter_entity(
+                entity_type, path, file_name=file_name, batch_size=batch_size, strings=strings,
+                extension=extension if extension is not None else _find_extension(path, file_name, ".csv"))
+
+    @staticmethod
+    @timed("csv.read_dataset")
+    def read_dataset(dataset_type: Type[Dataset], path: str, workers: int = 1, extension: str = None) -> Dataset:
+        """
+        Reads a dataset from multiple CSV documents. With more than one worker, the documents are read concurrently,
+        and large uncompressed documents are split into byte ranges which are parsed in a shared pool of processes.
+
+        :param dataset_type: the type of the dataset
+        :param path: the path of the documents
+        :param workers: the number of worker processes (None means the number of processors)
+        :param extension: the extension of the documents (e.g. .csv.gz), by default .csv or a compressed variant of it
+            which exists
         :return: the instance
         """
-        return dataset_type.from_sequence(
-            [
-                CSVHandler.read_entity(entity_type, path, file_name=entity_type.collection_name())
-                for entity_type in dataset_type.entity_types()
-            ]
-        )
+        strings = string_pool(dataset_type)
+        if workers is not None and workers <= 1:
+            return dataset_type.from_sequence(
+                [list(entities) for _, entities in CSVHandler.iter_dataset(dataset_type, path, extension=extension,
+                                                                           strings=strings)],
+                strings=strings
+            )
+
+        workers = workers if workers is not None else os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return dataset_type.from_sequence(_map_collections(
+                lambda entity_type: CSVHandler.read_entity_parallel(
+                    entity_type, path, workers=workers, executor=executor, strings=strings,
+                    extension=extension if extension is not None else _find_extension(
+                        path, entity_type.collection_name(), ".csv")),
+                dataset_type.entity_types(), workers=None), strings=strings)
 
     @staticmethod
-    def write_dataset(dataset: Dataset, path: str) -> None:
+    @timed("csv.write_dataset")
+    def write_dataset(dataset: Dataset, path: str, workers: int = 1, extension: str = ".csv",
+                      compression_level: int = None) -> None:
         """
         Writes a dataset to multiple CSV documents.
 
         :param dataset: the dataset instance
         :param path: the path of the documents
+        :param workers: the number of threads which write the documents concurrently (None means one for each)
+        :param extension: the extension of the documents, which selects the compression (e.g. .csv.gz)
+        :param compression_level: the level of the compression
         :return: nothing
         """
-        for entity_type in dataset.entity_types():
-            CSVHandler.write_entity(dataset.entities()[entity_type], path, file_name=entity_type.collection_name())
+        entities = dataset.entities()
+        _map_collections(
+            lambda entity_type: CSVHandler.write_entity(entities[entity_type], path,
+                                                        file_name=entity_type.collection_name(), extension=extension,
+                                                        entity_type=entity_type, compression_level=compression_level),
+            dataset.entity_types(), workers=workers)
+
+    @staticmethod
+    @timed("csv.write_changes")
+    def write_changes(dataset: Dataset, path: str, clear: bool = True, extension: str = ".csv") -> dict[str, str]:
+        """
+        Writes the changes of a dataset with change tracking (like CompanyDataset) to the CSV documents of its last
+        write: added entities are appended, the documents of otherwise changed collections are rewritten entirely (a
+        single modified or deleted entity rewrites the whole document of its collection).
+
+        :param dataset: the dataset instance
+        :param path: the path of the documents
+        :param clear: tells whether the changes should be cleared afterwards
+        :param extension: the extension of the documents (e.g. .csv.gz, compressed documents are appended to as well)
+        :return: the performed operations ("append" or "rewrite") by the names of the changed collections
+        """
+        return _write_changes(dataset, path, extension, lambda entities, entity_type, append: CSVHandler.write_entity(
+            entities, path, file_name=entity_type.collection_name(), extension=extension, entity_type=entity_type,
+            append=append), clear=clear)
 
 
 class JSONHandler:
@@ -94,8 +527,9 @@ class JSONHandler:
     """
 
     @staticmethod
-    def read_entity(entity_type: Type[Entity], path: str, file_name: str = None, extension: str = ".json") -> list[
-        Entity]:
+    @timed("json.read")
+    def read_entity(entity_type: Type[Entity], path: str, file_name: str = None, extension: str = ".json",
+                    strings: StringPool = None) -> list[Entity]:
         """
         Reads entries from a JSON document.
 
@@ -103,19 +537,30 @@ class JSONHandler:
         :param path: the path of the document
         :param file_name: the name of the document
         :param extension: the extension of the document
+        :param strings: the pool which interns the repeated strings of the entries as they are read (see
+            Entity.from_sequence)
         :return: the list of elements
         """
 
         file_name = file_name if file_name is not None else entity_type.collection_name()
         extension = extension if extension is not None else ".json"
 
-        with open(os.path.join(path, file_name + extension), "r", encoding="utf-8") as file:
-            return [entity_type.from_sequence([raw_entity[name] for name in entity_type.field_names()]) for
-                    raw_entity in json.load(file)]
+        getter = _getter(entity_type.field_names())
+        file_path = os.path.join(path, file_name + extension)
+        with _open(file_path, "r") as file:
+            with stage("json.parse") as measured:
+                raw_entities = json.load(file)
+                if instrumented():
+                    measured.add("bytes", os.path.getsize(file_path))
+        with stage("json.from_sequence") as measured:
+            measured.add("rows", len(raw_entities))
+            from_sequence = entity_type.from_sequence
+            return [from_sequence(getter(raw_entity), strings) for raw_entity in raw_entities]
 
     @staticmethod
+    @timed("json.write")
     def write_entity(entities: list[Entity], path: str, file_name: str = None, extension: str = ".json",
-                     pretty: bool = True) -> None:
+                     pretty: bool = True, compression_level: int = None, entity_type: Type[Entity] = None) -> None:
         """
         Writes entries to a CSV document.
 
@@ -124,127 +569,464 @@ class JSONHandler:
         :param file_name: the name of the document
         :param extension: the extension of the document
         :param pretty: tells whether the file should be indented or not
+        :param compression_level: the level of the compression if the extension selects one (e.g. .json.gz)
+        :param entity_type: the type of entries, it is needed only when the list can be empty
         :return: nothing
         """
+        if not entities and entity_type is None:
+            raise ValueError("the type of entries cannot be determined from an empty iterable")
+        entity_type = entity_type if entity_type is not None else type(entities[0])
 
-        file_name = file_name if file_name is not None else entities[0].collection_name()
+        file_name = file_name if file_name is not None else entity_type.collection_name()
         extension = extension if extension is not None else ".csv"
         pretty = pretty if pretty is not None else True
 
-        with open(os.path.join(path, file_name + extension), "w", newline="", encoding="utf-8") as file:
-            json.dump([entity.__dict__ for entity in entities], file, indent=2 if pretty else 0)
+        file_path = os.path.join(path, file_name + extension)
+        with _open(file_path, "w", newline="", compression_level=compression_level) as file:
+            field_names = entity_type.field_names()
+            json.dump([dict(zip(field_names, entity.to_sequence())) for entity in entities], file,
+                      indent=2 if pretty else 0)
+        if instrumented():
+            add("json.write", "rows", len(entities))
+            add("json.write", "bytes", os.path.getsize(file_path))
 
     @staticmethod
-    def read_dataset(dataset_type: Type[Dataset], path: str) -> Dataset:
+    @timed("json.read_dataset")
+    def read_dataset(dataset_type: Type[Dataset], path: str, workers: int = 1, extension: str = None) -> Dataset:
         """
         Reads a dataset from multiple JSON documents.
 
         :param dataset_type: the type of the dataset
         :param path: the path of the documents
+        :param workers: the number of worker processes which parse the documents concurrently (None means one for
+            each)
+        :param extension: the extension of the documents (e.g. .json.gz), by default .json or a compressed variant
+            of it which exists
         :return: the instance
         """
-        return dataset_type.from_sequence(
-            [
-                JSONHandler.read_entity(entity_type, path, file_name=entity_type.collection_name())
-                for entity_type in dataset_type.entity_types()
-            ]
-        )
+        entity_types = dataset_type.entity_types()
+        extensions = [extension if extension is not None else _find_extension(path, entity_type.collection_name(),
+                                                                               ".json")
+                      for entity_type in entity_types]
+        strings = string_pool(dataset_type)
+        if workers is not None and workers <= 1:
+            return dataset_type.from_sequence(
+                [
+                    JSONHandler.read_entity(entity_type, path, extension=extension, strings=strings)
+                    for entity_type, extension in zip(entity_types, extensions)
+                ],
+                strings=strings
+            )
+
+        with ProcessPoolExecutor(max_workers=workers or len(entity_types)) as executor:
+            futures = [executor.submit(JSONHandler.read_entity, entity_type, path, extension=extension,
+                                       strings=_worker_pool(strings))
+                       for entity_type, extension in zip(entity_types, extensions)]
+            return dataset_type.from_sequence([future.result() for future in futures])
 
     @staticmethod
-    def write_dataset(dataset: Dataset, path: str) -> None:
+    @timed("json.write_dataset")
+    def write_dataset(dataset: Dataset, path: str, workers: int = 1, extension: str = ".json",
+                      compression_level: int = None) -> None:
         """
         Writes a dataset to multiple JSON documents.
 
         :param dataset: the dataset instance
         :param path: the path of the documents
+        :param workers: the number of threads which write the documents concurrently (None means one for each)
+        :param extension: the extension of the documents, which selects the compression (e.g. .json.gz)
+        :param compression_level: the level of the compression
         :return: nothing
         """
-        for entity_type in dataset.entity_types():
-            JSONHandler.write_entity(dataset.entities()[entity_type], path, file_name=entity_type.collection_name())
+        entities = dataset.entities()
+        _map_collections(
+            lambda entity_type: JSONHandler.write_entity(entities[entity_type], path,
+                                                         file_name=entity_type.collection_name(), extension=extension,
+                                                         compression_level=compression_level, entity_type=entity_type),
+            dataset.entity_types(), workers=workers)
+
+    @staticmethod
+    @timed("json.write_changes")
+    def write_changes(dataset: Dataset, path: str, clear: bool = True, extension: str = ".json") -> dict[str, str]:
+        """
+        Writes the changes of a dataset with change tracking (like CompanyDataset) to the JSON documents of its last
+        write. A JSON array cannot be appended to, so the whole documents of the changed collections are rewritten.
+
+        :param dataset: the dataset instance
+        :param path: the path of the documents
+        :param clear: tells whether the changes should be cleared afterwards
+        :param extension: the extension of the documents (e.g. .json.gz)
+        :return: the performed operations by the names of the changed collections
+        """
+        def write(entities: Iterable[Entity], entity_type: Type[Entity], append: bool) -> Any:
+            if append:
+                return NotImplemented
+            return JSONHandler.write_entity(entities, path, file_name=entity_type.collection_name(),
+                                            extension=extension, entity_type=entity_type)
+
+        return _write_changes(dataset, path, extension, write, clear=clear)
+
+
+@dataclass(frozen=True)
+class JSONCodec:
+    """
+    A pair of functions which decode and encode single JSON values.
+    """
+
+    loads: Callable[[str], Any]
+    dumps: Callable[[Any], str]
+
+    @staticmethod
+    def default() -> JSONCodec:
+        """
+        Returns the fastest available codec: orjson if it is installed, the standard json module otherwise.
+
+        :return: the codec
+        """
+        try:
+            import orjson
+        except ImportError:
+            return JSONCodec(json.loads, partial(json.dumps, ensure_ascii=False))
+        return JSONCodec(orjson.loads, lambda value: orjson.dumps(value).decode("utf-8"))
+
+
+class JSONLinesHandler:
+    """
+    A class that handles JSON Lines documents: every line of a document holds one entry as a JSON object. The
+    documents are read and written line by line, so they never have to fit into the memory.
+    """
+
+    codec: JSONCodec = JSONCodec.default()
+
+    @staticmethod
+    @timed("jsonl.read")
+    def iter_entity(entity_type: Type[Entity], path: str, file_name: str = None, extension: str = ".jsonl",
+                    batch_size: int = None, codec: JSONCodec = None,
+                    strings: StringPool = None) -> Iterator[Entity] | Iterator[list[Entity]]:
+        """
+        Lazily reads entries from a JSON Lines document.
+
+        :param entity_type: the type of entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param batch_size: if it is given, lists of (at most) this many elements are yielded instead of single elements
+        :param codec: the JSON codec, JSONLinesHandler.codec is used when it is omitted
+        :param strings: the pool which interns the repeated strings of the entries as they are read (see
+            Entity.from_sequence)
+        :return: the iterator of elements (or batches)
+        """
+
+        file_name = file_name if file_name is not None else entity_type.collection_name()
+        extension = extension if extension is not None else ".jsonl"
+        codec = codec if codec is not None else JSONLinesHandler.codec
+        assert batch_size is None or batch_size > 0
+
+        getter = _getter(entity_type.field_names())
+        from_sequence = entity_type.from_sequence
+        loads = codec.loads
+        file_path = os.path.join(path, file_name + extension)
+        with _open(file_path, "r") as file:
+            lines = file
+            if instrumented():
+                add("jsonl.read", "bytes", os.path.getsize(file_path))
+                lines = timed_iterator("jsonl.io", file, counter="lines")
+            entities = (from_sequence(getter(loads(line)), strings) for line in lines if not line.isspace())
+            if batch_size is None:
+                yield from entities
+            else:
+                while batch := list(islice(entities, batch_size)):
+                    yield batch
+
+    @staticmethod
+    def read_entity(entity_type: Type[Entity], path: str, file_name: str = None,
+                    extension: str = ".jsonl", strings: StringPool = None) -> list[Entity]:
+        """
+        Reads entries from a JSON Lines document.
+
+        :param entity_type: the type of entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param strings: the pool which interns the repeated strings of the entries as they are read (see
+            Entity.from_sequence)
+        :return: the list of elements
+        """
+
+        return list(JSONLinesHandler.iter_entity(entity_type, path, file_name=file_name, extension=extension,
+                                                 strings=strings))
+
+    @staticmethod
+    @timed("jsonl.write")
+    def write_entity(entities: Iterable[Entity], path: str, file_name: str = None, extension: str = ".jsonl",
+                     batch_size: int = 1000, codec: JSONCodec = None, entity_type: Type[Entity] = None,
+                     append: bool = False, compression_level: int = None) -> int:
+        """
+        Writes entries to a JSON Lines document. The entries can be given by any iterable, the lines are written in
+        batches.
+
+        :param entities: the entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param batch_size: the number of lines which are written at once
+        :param codec: the JSON codec, JSONLinesHandler.codec is used when it is omitted
+        :param entity_type: the type of entries, it is needed only when the iterable can be empty
+        :param append: tells whether the entries should be appended to the document
+        :param compression_level: the level of the compression if the extension selects one (e.g. .jsonl.gz)
+        :return: the number of written entries
+        """
+
+        entities = iter(entities)
+        first = next(entities, None)
+        if first is None and entity_type is None:
+            raise ValueError("the type of entries cannot be determined from an empty iterable")
+        entity_type = entity_type if entity_type is not None else type(first)
+
+        file_name = file_name if file_name is not None else entity_type.collection_name()
+        extension = extension if extension is not None else ".jsonl"
+        batch_size = batch_size if batch_size is not None else 1000
+        codec = codec if codec is not None else JSONLinesHandler.codec
+        assert batch_size > 0
+
+        field_names = entity_type.field_names()
+        dumps = codec.dumps
+        lines = (dumps(dict(zip(field_names, entity.to_sequence()))) + "\n"
+                 for entity in (chain((first,), entities) if first is not None else ()))
+
+        count = 0
+        file_path = os.path.join(path, file_name + extension)
+        with _open(file_path, "a" if append else "w", newline="", compression_level=compression_level) as file:
+            while batch := list(islice(lines, batch_size)):
+                file.writelines(batch)
+                count += len(batch)
+        if instrumented():
+            add("jsonl.write", "rows", count)
+            add("jsonl.write", "batches", -(-count // batch_size))
+            add("jsonl.write", "bytes", os.path.getsize(file_path))
+        return count
+
+    @staticmethod
+    @timed("jsonl.read_dataset")
+    def read_dataset(dataset_type: Type[Dataset], path: str, workers: int = 1, extension: str = None) -> Dataset:
+        """
+        Reads a dataset from multiple JSON Lines documents.
+
+        :param dataset_type: the type of the dataset
+        :param path: the path of the documents
+        :param workers: the number of worker processes which parse the documents concurrently (None means one for
+            each)
+        :param extension: the extension of the documents (e.g. .jsonl.gz), by default .jsonl or a compressed variant
+            of it which exists
+        :return: the instance
+        """
+        entity_types = dataset_type.entity_types()
+        extensions = [extension if extension is not None else _find_extension(path, entity_type.collection_name(),
+                                                                               ".jsonl")
+                      for entity_type in entity_types]
+        strings = string_pool(dataset_type)
+        if workers is not None and workers <= 1:
+            return dataset_type.from_sequence(
+                [
+                    JSONLinesHandler.read_entity(entity_type, path, extension=extension, strings=strings)
+                    for entity_type, extension in zip(entity_types, extensions)
+                ],
+                strings=strings
+            )
+
+        with ProcessPoolExecutor(max_workers=workers or len(entity_types)) as executor:
+            futures = [executor.submit(JSONLinesHandler.read_entity, entity_type, path, extension=extension,
+                                       strings=_worker_pool(strings))
+                       for entity_type, extension in zip(entity_types, extensions)]
+            return dataset_type.from_sequence([future.result() for future in futures])
+
+    @staticmethod
+    @timed("jsonl.write_dataset")
+    def write_dataset(dataset: Dataset, path: str, workers: int = 1, extension: str = ".jsonl",
+                      compression_level: int = None) -> None:
+        """
+        Writes a dataset to multiple JSON Lines documents.
+
+        :param dataset: the dataset instance
+        :param path: the path of the documents
+        :param workers: the number of threads which write the documents concurrently (None means one for each)
+        :param extension: the extension of the documents, which selects the compression (e.g. .jsonl.gz)
+        :param compression_level: the level of the compression
+        :return: nothing
+        """
+        entities = dataset.entities()
+        _map_collections(
+            lambda entity_type: JSONLinesHandler.write_entity(entities[entity_type], path,
+                                                              file_name=entity_type.collection_name(),
+                                                              extension=extension, entity_type=entity_type,
+                                                              compression_level=compression_level),
+            dataset.entity_types(), workers=workers)
+
+    @staticmethod
+    @timed("jsonl.write_changes")
+    def write_changes(dataset: Dataset, path: str, clear: bool = True, extension: str = ".jsonl") -> dict[str, str]:
+        """
+        Writes the changes of a dataset with change tracking (like CompanyDataset) to the JSON Lines documents of its
+        last write: added entities are appended, the documents of otherwise changed collections are rewritten
+        entirely (a single modified or deleted entity rewrites the whole document of its collection).
+
+        :param dataset: the dataset instance
+        :param path: the path of the documents
+        :param clear: tells whether the changes should be cleared afterwards
+        :param extension: the extension of the documents (e.g. .jsonl.gz, compressed documents are appended to as well)
+        :return: the performed operations ("append" or "rewrite") by the names of the changed collections
+        """
+        return _write_changes(dataset, path, extension,
+                              lambda entities, entity_type, append: JSONLinesHandler.write_entity(
+                                  entities, path, file_name=entity_type.collection_name(), extension=extension,
+                                  entity_type=entity_type, append=append),
+                              clear=clear)
 
 
 class XLSXHandler:
     """
-    A class that handles XLSX documents.
+    A class that handles XLSX documents. Documents are read with read-only and written with write-only workbooks, so
+    the rows are streamed instead of loading (or building) the whole document in the memory.
     """
 
     @staticmethod
-    def read_entity(entity_type: Type[Entity], workbook: openpyxl.Workbook, sheet_name: str = None,
-                    heading: bool = True) -> list[Entity]:
+    @timed("xlsx.read")
+    def iter_entity(entity_type: Type[Entity], workbook: openpyxl.Workbook, sheet_name: str = None,
+                    heading: bool = True, strings: StringPool = None) -> Iterator[Entity]:
         """
-        Reads entries from an XLSX document.
+        Lazily reads entries from an XLSX document. The rows are read until the first one with an empty first cell.
 
         :param entity_type: the type of entries
-        :param workbook: the workbook instance
+        :param workbook: the workbook instance (preferably opened with read_only=True)
         :param sheet_name: the name of the worksheet
-        :param heading: tells whether a heading should be added to the worksheet
-        :return: the list of elements
+        :param heading: tells whether a heading can be found in the worksheet
+        :param strings: the pool which interns the repeated strings of the entries as they are read (see
+            Entity.from_sequence)
+        :return: the iterator of elements
         """
 
         sheet_name = sheet_name if sheet_name is not None else entity_type.collection_name()
         heading = heading if heading is not None else True
 
-        sheet = workbook[sheet_name]
-        entities = []
-
-        row = 2 if heading else 1
-        while True:
-            cell = sheet.cell(row=row, column=1)
-            if cell.value is None:
+        from_sequence = entity_type.from_sequence
+        rows = workbook[sheet_name].iter_rows(min_row=2 if heading else 1, max_col=len(entity_type.field_names()),
+                                              values_only=True)
+        for values in timed_iterator("xlsx.cells", rows) if instrumented() else rows:
+            if values[0] is None:
                 break
+            yield from_sequence(values, strings)
 
-            values = [sheet.cell(row=row, column=pos).value for pos in range(1, len(entity_type.field_names()) + 1)]
-            entities.append(entity_type.from_sequence(values))
-            row += 1
+    @staticmethod
+    def read_entity(entity_type: Type[Entity], workbook: openpyxl.Workbook, sheet_name: str = None,
+                    heading: bool = True, strings: StringPool = None) -> list[Entity]:
+        """
+        Reads entries from an XLSX document.
 
-        return entities
+        :param entity_type: the type of entries
+        :param workbook: the workbook instance
+        :param sheet_name: the name of the worksheet
+        :param heading: tells whether a heading can be found in the worksheet
+        :param strings: the pool which interns the repeated strings of the entries as they are read (see
+            Entity.from_sequence)
+        :return: the list of elements
+        """
+
+        return list(XLSXHandler.iter_entity(entity_type, workbook, sheet_name=sheet_name, heading=heading,
+                                            strings=strings))
 
     @staticmethod
-    def write_entity(entities: list[Entity], workbook: openpyxl.Workbook, sheet_name: str = None,
-                     heading: bool = True) -> None:
+    @timed("xlsx.write")
+    def write_entity(entities: Iterable[Entity], workbook: openpyxl.Workbook, sheet_name: str = None,
+                     heading: bool = True, entity_type: Type[Entity] = None) -> int:
         """
-        Writes entries to an XLSX document.
+        Writes entries to an XLSX document. The entries are appended to a new worksheet row by row.
 
         :param entities: the entries
-        :param workbook: the workbook instance
+        :param workbook: the workbook instance (preferably created with write_only=True)
         :param sheet_name: the name of the worksheet
-        :param heading: tells whether a heading can be found in the worksheet
-        :return: nothing
+        :param heading: tells whether a heading should be added to the worksheet
+        :param entity_type: the type of entries, it is needed only when the iterable can be empty
+        :return: the number of written entries
         """
 
-        sheet_name = sheet_name if sheet_name is not None else entities[0].collection_name()
+        entities = iter(entities)
+        first = next(entities, None)
+        if first is None and entity_type is None:
+            raise ValueError("the type of entries cannot be determined from an empty iterable")
+        entity_type = entity_type if entity_type is not None else type(first)
+
+        sheet_name = sheet_name if sheet_name is not None else entity_type.collection_name()
         heading = heading if heading is not None else True
 
         sheet = workbook.create_sheet(sheet_name)
         if heading:
-            for i in range(len(entities[0].field_names())):
-                sheet.cell(row=1, column=i + 1, value=entities[0].field_names()[i])
+            sheet.append(entity_type.field_names())
 
-        row = 2 if heading else 1
-        for entity in entities:
-            for j in range(len(entities[0].field_names())):
-                sheet.cell(row=row, column=j + 1, value=entity.__dict__[entities[0].field_names()[j]])
-            row += 1
+        count = 0
+        if first is not None:
+            for entity in chain((first,), entities):
+                sheet.append(entity.to_sequence())
+                count += 1
+        return count
 
     @staticmethod
-    def read_dataset(dataset_type: Type[Dataset], path: str) -> Dataset:
+    def read_sheet(entity_type: Type[Entity], path: str, strings: StringPool = None) -> list[Entity]:
+        """
+        Reads the entries of a type from an XLSX document, using a read-only workbook of its own (workbooks must not be
+        shared between threads or processes).
+
+        :param entity_type: the type of entries
+        :param path: the path of the document
+        :param strings: the pool which interns the repeated strings of the entries
+        :return: the list of elements
+        """
+
+        import openpyxl
+
+        with stage("xlsx.load_workbook"):
+            wb = openpyxl.load_workbook(os.path.join(path, "dataset.xlsx"), read_only=True)
+        try:
+            return XLSXHandler.read_entity(entity_type, wb, sheet_name=entity_type.collection_name(), strings=strings)
+        finally:
+            wb.close()
+
+    @staticmethod
+    @timed("xlsx.read_dataset")
+    def read_dataset(dataset_type: Type[Dataset], path: str, workers: int = 1) -> Dataset:
         """
         Reads a dataset from an XLSX document.
 
         :param dataset_type: the type of the dataset
         :param path: the path of the document
+        :param workers: the number of worker processes which parse the worksheets concurrently (None means one for
+            each)
         :return: the instance
         """
 
-        wb = openpyxl.load_workbook(os.path.join(path, "dataset.xlsx"))
-        return dataset_type.from_sequence(
-            [
-                XLSXHandler.read_entity(entity_type, wb, sheet_name=entity_type.collection_name())
-                for entity_type in dataset_type.entity_types()
-            ]
-        )
+        strings = string_pool(dataset_type)
+        if workers is None or workers > 1:
+            entity_types = dataset_type.entity_types()
+            with ProcessPoolExecutor(max_workers=workers or len(entity_types)) as executor:
+                return dataset_type.from_sequence(list(executor.map(
+                    partial(XLSXHandler.read_sheet, path=path, strings=_worker_pool(strings)), entity_types)))
+
+        import openpyxl
+
+        with stage("xlsx.load_workbook"):
+            wb = openpyxl.load_workbook(os.path.join(path, "dataset.xlsx"), read_only=True)
+        try:
+            return dataset_type.from_sequence(
+                [
+                    XLSXHandler.read_entity(entity_type, wb, sheet_name=entity_type.collection_name(), strings=strings)
+                    for entity_type in dataset_type.entity_types()
+                ],
+                strings=strings
+            )
+        finally:
+            wb.close()
 
     @staticmethod
+    @timed("xlsx.write_dataset")
     def write_dataset(dataset: Dataset, path: str) -> None:
         """
         Writes a dataset to to an XLSX document.
@@ -254,111 +1036,709 @@ class XLSXHandler:
         :return: nothing
         """
 
-        wb = Workbook()
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        for entity_type in dataset.entity_types():
+            XLSXHandler.write_entity(dataset.entities()[entity_type], wb, sheet_name=entity_type.collection_name(),
+                                     entity_type=entity_type)
+        with stage("xlsx.save"):
+            wb.save(os.path.join(path, "dataset.xlsx"))
+
+
+def _arrow_schema(entity_type: Type[Entity]) -> pyarrow.Schema:
+    """
+    Derives the Arrow schema of an entity type from the annotations of its fields.
+
+    :param entity_type: the type of entities (a dataclass)
+    :return: the schema
+    """
+    import pyarrow as pa
+
+    types = {"str": pa.string(), "int": pa.int64(), "float": pa.float64(), "bool": pa.bool_()}
+    annotations = {f.name: f.type if isinstance(f.type, str) else f.type.__name__ for f in fields(entity_type)}
+    return pa.schema([pa.field(name, types[annotations[name]], nullable=name != entity_type.field_names()[0])
+                      for name in entity_type.field_names()])
+
+
+class ParquetHandler:
+    """
+    A class that handles Parquet documents (it needs pyarrow, which is imported on first use). The columns are typed
+    by the fields of the entities, the rows are streamed in row groups, and single columns can be read without the
+    rest of the document.
+    """
+
+    @staticmethod
+    @timed("parquet.read")
+    def iter_entity(entity_type: Type[Entity], path: str, file_name: str = None, extension: str = ".parquet",
+                    batch_size: int = None, strings: StringPool = None) -> Iterator[Entity] | Iterator[list[Entity]]:
+        """
+        Lazily reads entries from a Parquet document, one record batch at a time.
+
+        :param entity_type: the type of entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param batch_size: if it is given, lists of (at most) this many elements are yielded instead of single elements
+        :param strings: the pool which interns the repeated strings of the entries as they are read (see
+            Entity.from_sequence)
+        :return: the iterator of elements (or batches)
+        """
+        import pyarrow.parquet as pq
+
+        file_name = file_name if file_name is not None else entity_type.collection_name()
+        assert batch_size is None or batch_size > 0
+
+        with pq.ParquetFile(os.path.join(path, file_name + extension)) as file:
+            for batch in file.iter_batches(batch_size=batch_size or 65536, columns=list(entity_type.field_names())):
+                rows = zip(*[column.to_pylist() for column in batch.columns])
+                if strings is None:
+                    entities = [entity_type(*values) for values in rows]
+                else:
+                    from_sequence = entity_type.from_sequence
+                    entities = [from_sequence(values, strings) for values in rows]
+                if batch_size is None:
+                    yield from entities
+                else:
+                    yield entities
+
+    @staticmethod
+    def read_entity(entity_type: Type[Entity], path: str, file_name: str = None,
+                    extension: str = ".parquet", strings: StringPool = None) -> list[Entity]:
+        """
+        Reads entries from a Parquet document.
+
+        :param entity_type: the type of entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param strings: the pool which interns the repeated strings of the entries as they are read (see
+            Entity.from_sequence)
+        :return: the list of elements
+        """
+        return list(ParquetHandler.iter_entity(entity_type, path, file_name=file_name, extension=extension,
+                                               strings=strings))
+
+    @staticmethod
+    @timed("parquet.read_columns")
+    def read_columns(entity_type: Type[Entity], path: str, columns: Sequence[str] = None, file_name: str = None,
+                     extension: str = ".parquet") -> dict[str, Any]:
+        """
+        Reads columns of a Parquet document, only the selected ones are read from the file. The frequently repeated
+        strings (the interned fields of the entity type apart from its key, e.g. the company names of people) are
+        returned as dictionary-encoded StringColumn instances, the rest as NumPy arrays.
+
+        :param entity_type: the type of entries
+        :param path: the path of the document
+        :param columns: the names of the fields, all of them when it is omitted
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :return: the dictionary of columns by the field names
+        """
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from data.project.columnar import StringColumn
+
+        file_name = file_name if file_name is not None else entity_type.collection_name()
+        columns = list(columns) if columns is not None else list(entity_type.field_names())
+        # the values of the key are unique, so a dictionary would not make them smaller
+        repeated = set(entity_type.interned_fields()) - {entity_type.field_names()[0]}
+
+        table = pq.read_table(os.path.join(path, file_name + extension), columns=columns,
+                              read_dictionary=[name for name in columns if name in repeated])
+        result = {}
+        for name in columns:
+            column = table.column(name).combine_chunks()
+            if pa.types.is_dictionary(column.type):
+                codes = column.indices.to_numpy(zero_copy_only=False)
+                result[name] = StringColumn(codes.astype(np.int32, copy=False), column.dictionary.to_pylist())
+            else:
+                result[name] = column.to_numpy(zero_copy_only=False)
+        return result
+
+    @staticmethod
+    @timed("parquet.write")
+    def write_entity(entities: Iterable[Entity], path: str, file_name: str = None, extension: str = ".parquet",
+                     compression: str = "snappy", compression_level: int = None, row_group_size: int = 65536,
+                     entity_type: Type[Entity] = None) -> int:
+        """
+        Writes entries to a Parquet document. The entries are converted and written one row group at a time.
+
+        :param entities: the entries
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param compression: the compression codec (e.g. snappy, zstd, gzip or none)
+        :param compression_level: the level of the codec, its default when it is omitted
+        :param row_group_size: the number of rows in a row group
+        :param entity_type: the type of entries, it is needed only when the iterable can be empty
+        :return: the number of written entries
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        entities = iter(entities)
+        first = next(entities, None)
+        if first is None and entity_type is None:
+            raise ValueError("the type of entries cannot be determined from an empty iterable")
+        entity_type = entity_type if entity_type is not None else type(first)
+        file_name = file_name if file_name is not None else entity_type.collection_name()
+        schema = _arrow_schema(entity_type)
+
+        count = 0
+        with pq.ParquetWriter(os.path.join(path, file_name + extension), schema, compression=compression,
+                              compression_level=compression_level) as writer:
+            rows = chain((first,), entities) if first is not None else iter(())
+            while batch := list(islice(rows, row_group_size)):
+                values = zip(*[entity.to_sequence() for entity in batch])
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(column, type=field.type) for column, field in zip(values, schema)], schema=schema))
+                count += len(batch)
+        return count
+
+    @staticmethod
+    @timed("parquet.write_columns")
+    def write_columns(entity_type: Type[Entity], columns: dict[str, Any], path: str, file_name: str = None,
+                      extension: str = ".parquet", compression: str = "snappy", compression_level: int = None,
+                      row_group_size: int = 65536) -> int:
+        """
+        Writes the columns of a columnar dataset to a Parquet document without creating entities.
+
+        :param entity_type: the type of entries
+        :param columns: the columns by the field names
+        :param path: the path of the document
+        :param file_name: the name of the document
+        :param extension: the extension of the document
+        :param compression: the compression codec (e.g. snappy, zstd, gzip or none)
+        :param compression_level: the level of the codec, its default when it is omitted
+        :param row_group_size: the number of rows in a row group
+        :return: the number of written entries
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from data.project.columnar import StringColumn, PackedStringColumn
+
+        def array(column: Any, data_type: pyarrow.DataType) -> pyarrow.Array:
+            if isinstance(column, StringColumn):
+                return pa.DictionaryArray.from_arrays(column.codes, column.categories).cast(data_type)
+            if isinstance(column, PackedStringColumn):
+                return pa.array(column.decode(), type=data_type)
+            return pa.array(column, type=data_type)
+
+        file_name = file_name if file_name is not None else entity_type.collection_name()
+        schema = _arrow_schema(entity_type)
+        table = pa.Table.from_arrays([array(columns[field.name], field.type) for field in schema], schema=schema)
+        pq.write_table(table, os.path.join(path, file_name + extension), row_group_size=row_group_size,
+                       compression=compression, compression_level=compression_level)
+        return table.num_rows
+
+    @staticmethod
+    @timed("parquet.read_dataset")
+    def read_dataset(dataset_type: Type[Dataset], path: str) -> Dataset:
+        """
+        Reads a dataset from multiple Parquet documents. A ColumnarCompanyDataset is returned with lazily loaded
+        columns (e.g. query-1 only reads the company names and the ages of people), other types are created from the
+        entities.
+
+        :param dataset_type: the type of the dataset
+        :param path: the path of the documents
+        :return: the instance
+        """
+        from data.project.columnar import ColumnarCompanyDataset
+
+        if issubclass(ColumnarCompanyDataset, dataset_type):
+            return ColumnarCompanyDataset.lazy(
+                lambda entity_type, name: ParquetHandler.read_columns(entity_type, path, [name])[name])
+        strings = string_pool(dataset_type)
+        return dataset_type.from_sequence(
+            [
+                ParquetHandler.read_entity(entity_type, path, strings=strings)
+                for entity_type in dataset_type.entity_types()
+            ],
+            strings=strings
+        )
+
+    @staticmethod
+    @timed("parquet.write_dataset")
+    def write_dataset(dataset: Dataset, path: str, compression: str = "snappy",
+                      compression_level: int = None) -> None:
+        """
+        Writes a dataset to multiple Parquet documents. Columnar datasets are written column by column.
+
+        :param dataset: the dataset instance
+        :param path: the path of the documents
+        :param compression: the compression codec (e.g. snappy, zstd, gzip or none)
+        :param compression_level: the level of the codec, its default when it is omitted
+        :return: nothing
+        """
         for entity_type in dataset.entity_types():
-            XLSXHandler.write_entity(dataset.entities()[entity_type], wb, sheet_name=entity_type.collection_name())
-        wb.remove(wb["Sheet"])
-        wb.save(os.path.join(path, "dataset.xlsx"))
+            if hasattr(dataset, "column"):
+                columns = {name: dataset.column(entity_type, name) for name in entity_type.field_names()}
+                ParquetHandler.write_columns(entity_type, columns, path, compression=compression,
+                                             compression_level=compression_level)
+            else:
+                ParquetHandler.write_entity(dataset.entities()[entity_type], path, compression=compression,
+                                            compression_level=compression_level, entity_type=entity_type)
+
+
+def _identifier(name: str) -> str:
+    """
+    Checks whether a string can be used as an SQL identifier (of a table or a column).
+
+    :param name: the string
+    :return: the string itself
+    """
+    if not name.isidentifier():
+        raise ValueError(f"invalid SQL identifier: {name!r}")
+    return name
+
+
+def _placeholder(connection) -> str:
+    """
+    Returns the parameter placeholder of a DB-API connection: "?" for drivers with qmark paramstyle (like sqlite3, which
+    can be used as a local stand-in for MySQL) and "%s" otherwise.
+
+    :param connection: the database connection
+    :return: the placeholder
+    """
+    module = type(connection).__module__
+    while module:
+        paramstyle = getattr(sys.modules.get(module), "paramstyle", None)
+        if paramstyle is not None:
+            return "?" if paramstyle == "qmark" else "%s"
+        module = module.rpartition(".")[0]
+    return "%s"
+
+
+def _is_sqlite(connection) -> bool:
+    """
+    Tells whether a connection is an sqlite3 connection (the local stand-in for MySQL).
+
+    :param connection: the database connection
+    :return: the result
+    """
+    return type(connection).__module__.partition(".")[0] == "sqlite3"
+
+
+def _upsert_clause(connection, field_names: Sequence[str]) -> str:
+    """
+    Returns the clause which turns an INSERT statement into an upsert: the rows whose primary keys exist are updated.
+
+    :param connection: the database connection
+    :param field_names: the columns, the first one is the primary key
+    :return: the clause
+    """
+    if _is_sqlite(connection):
+        return " ON CONFLICT ({key}) DO UPDATE SET {columns}".format(
+            key=field_names[0], columns=", ".join(f"{name} = excluded.{name}" for name in field_names[1:]))
+    return " ON DUPLICATE KEY UPDATE {columns}".format(
+        columns=", ".join(f"{name} = VALUES({name})" for name in field_names[1:]))
+
+
+@dataclass(frozen=True)
+class LoadReport:
+    """
+    Describes a bulk load into a database table.
+    """
+
+    table: str
+    rows: int
+    chunks: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+    def __str__(self) -> str:
+        return f"{self.table}: {self.rows} rows in {self.chunks} chunks, {self.seconds:.3f} s " \
+               f"({self.rows_per_second:.0f} rows/s)"
+
+
+def _restore_checks(cursor: MySQLCursor, statements: Sequence[str], failure: BaseException = None) -> None:
+    """
+    Executes the statements which turn the checks of a bulk load back on. All of them are attempted, and the first
+    error is raised, unless the load itself has failed: then the error is logged, so it does not hide the failure.
+
+    :param cursor: the cursor of the load
+    :param statements: the statements
+    :param failure: the exception which has stopped the load
+    :return: nothing
+    """
+    error = None
+    for statement in statements:
+        try:
+            cursor.execute(statement)
+        except Exception as e:
+            error = error or e
+            if failure is not None:
+                logging.getLogger(__name__).exception("%s failed after a failed bulk load", statement)
+    if error is not None and failure is None:
+        raise error
 
 
 class SQLHandler:
     """
-    A class that handles a MySQL connection.
+    A class that handles a MySQL connection. Any DB-API connection with the same interface (e.g. an sqlite3
+    connection) can be used instead.
     """
 
     @staticmethod
-    def read_entity(entity_type: Type[Entity], connection: MySQLConnection, table_name: str = None) -> list[Entity]:
+    @timed("sql.read")
+    def iter_rows(table_name: str, connection: MySQLConnection, columns: Sequence[str] = None, where: str = None,
+                  params: Sequence = (), batch_size: int = 1000) -> Iterator[tuple]:
         """
-        Reads entries from a database table.
+        Lazily reads rows from a database table. The rows are fetched in batches through an unbuffered cursor, so the
+        client never holds more than a batch of them.
+
+        :param table_name: the name of the database table
+        :param connection: the database connection
+        :param columns: the projection: the names of the columns to read (all of them when it is omitted)
+        :param where: an optional predicate (the body of a WHERE clause), it may contain parameter placeholders
+        :param params: the values of the placeholders of the predicate
+        :param batch_size: the number of rows which are fetched at once
+        :return: the iterator of rows
+        """
+
+        assert batch_size > 0
+
+        statement = "SELECT {columns} FROM {table}".format(
+            columns=", ".join(_identifier(column) for column in columns) if columns else "*",
+            table=_identifier(table_name))
+        if where:
+            statement += f" WHERE {where}"
+
+        try:
+            cursor = connection.cursor(buffered=False)
+        except TypeError:
+            cursor = connection.cursor()
+        exhausted = False
+        try:
+            with stage("sql.execute"):
+                cursor.execute(statement, tuple(params))
+            while True:
+                with stage("sql.fetch") as measured:
+                    rows = cursor.fetchmany(batch_size)
+                    measured.add("rows", len(rows))
+                if not rows:
+                    break
+                yield from rows
+            exhausted = True
+        finally:
+            if not exhausted and hasattr(connection, "consume_results"):
+                connection.consume_results()
+            cursor.close()
+
+    @staticmethod
+    def iter_entity(entity_type: Type[Entity], connection: MySQLConnection, table_name: str = None,
+                    where: str = None, params: Sequence = (), batch_size: int = 1000,
+                    strings: StringPool = None) -> Iterator[Entity]:
+        """
+        Lazily reads entries from a database table (see iter_rows).
 
         :param entity_type: the type of entries
         :param connection: the database connection
         :param table_name: the name of the database table
-        :return: the list of elements
+        :param where: an optional predicate (the body of a WHERE clause), it may contain parameter placeholders
+        :param params: the values of the placeholders of the predicate
+        :param batch_size: the number of rows which are fetched at once
+        :param strings: the pool which interns the repeated strings of the entries as they are read (see
+            Entity.from_sequence)
+        :return: the iterator of elements
         """
 
         table_name = table_name if table_name is not None else entity_type.collection_name()
 
-        cursor = connection.cursor()
-        cursor.execute("SELECT * FROM {table}"
-                       .format(table=table_name if table_name is not None else entity_type.collection_name()))
-        result = [entity_type.from_sequence(row) for row in cursor.fetchall()]
-        cursor.close()
-        return result
+        from_sequence = entity_type.from_sequence
+        for row in SQLHandler.iter_rows(table_name, connection, columns=entity_type.field_names(), where=where,
+                                        params=params, batch_size=batch_size):
+            yield from_sequence(row, strings)
+
+    @staticmethod
+    def read_entity(entity_type: Type[Entity], connection: MySQLConnection, table_name: str = None,
+                    where: str = None, params: Sequence = (), strings: StringPool = None) -> list[Entity]:
+        """
+        Reads entries from a database table.
+
+        :param entity_type: the type of entries
+        :param connection: the database connection
+        :param table_name: the name of the database table
+        :param where: an optional predicate (the body of a WHERE clause), it may contain parameter placeholders
+        :param params: the values of the placeholders of the predicate
+        :param strings: the pool which interns the repeated strings of the entries as they are read (see
+            Entity.from_sequence)
+        :return: the list of elements
+        """
+
+        return list(SQLHandler.iter_entity(entity_type, connection, table_name=table_name, where=where,
+                                           params=params, strings=strings))
 
     @staticmethod
-    def write_entity(entities: list[Entity], connection: MySQLConnection, table_name: str = None,
-                     create: bool = True) -> None:
+    @timed("sql.bulk_load")
+    def bulk_load(entities: Iterable[Entity], connection: MySQLConnection, table_name: str = None,
+                  create: bool = True, chunk_size: int = 1000, disable_checks: bool = False,
+                  entity_type: Type[Entity] = None, upsert: bool = False, commit: bool = True) -> LoadReport:
         """
-        Writes entries to an XLSX document.
+        Loads entries into a database table. The entries are inserted in chunks: every chunk is sent as a single
+        multi-row INSERT statement and committed on its own, so neither the statements nor the transactions grow with
+        the number of entries.
 
         :param entities: the entries
         :param connection: the database connection
         :param table_name: the name of the database table
         :param create: tells whether the table should be created (and a previous instance should be dropped)
-        :return: nothing
+        :param chunk_size: the number of rows per statement (and transaction)
+        :param disable_checks: tells whether foreign key and unique checks should be turned off during the load (the
+            indexes of the table are rebuilt afterwards, even if the load fails, see _restore_checks)
+        :param entity_type: the type of entries, it is needed only when the iterable can be empty
+        :param upsert: tells whether existing rows (with the same primary keys) should be updated instead of failing
+        :param commit: tells whether the chunks should be committed, otherwise the caller commits the transaction
+        :return: the report of the load
         """
 
-        table_name = table_name if table_name is not None else entities[0].collection_name()
-        create = create if create is not None else True
-
-        def get_insert_command(entity_name: str, field_names: list[str]) -> str:
-            """
-            Returns an INSERT INTO statement.
+        entities = iter(entities)
+        first = next(entities, None)
+        if first is None and entity_type is None:
+            raise ValueError("the type of entries cannot be determined from an empty iterable")
+        entity_type = entity_type if entity_type is not None else type(first)
 
-            :param entity_name: the name of the entity (table)
-            :param field_names: the name of the fields
-            :return: the statement
-            """
+        table_name = _identifier(table_name if table_name is not None else entity_type.collection_name())
+        create = create if create is not None else True
+        chunk_size = chunk_size if chunk_size is not None else 1000
+        assert chunk_size > 0
 
-            return "INSERT INTO {table} ({columns}) VALUES ({values})".format(
-                table=entity_name,
-                columns=", ".join(field_names),
-                values=", ".join(["%s" for _ in field_names]))
+        field_names = entity_type.field_names()
+        row = "({values})".format(values=", ".join(_placeholder(connection) for _ in field_names))
+        prefix = "INSERT INTO {table} ({columns}) VALUES ".format(table=table_name, columns=", ".join(field_names))
+        suffix = _upsert_clause(connection, field_names) if upsert else ""
+        statements = {}
 
+        start = time.perf_counter()
+        rows = chunks = 0
         cursor = connection.cursor()
-        if create:
-            cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-            for _ in cursor.execute(entities[0].create_table(), multi=True):
-                pass
+        enable = []
+        failure = None
+        try:
+            if create:
+                cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+                cursor.execute(entity_type.create_table().strip().rstrip(";"))
+            if disable_checks and _is_sqlite(connection):
+                cursor.execute("PRAGMA foreign_keys")
+                enable = [f"PRAGMA foreign_keys = {cursor.fetchone()[0]}", f"REINDEX {table_name}"]
+                cursor.execute("PRAGMA foreign_keys = OFF")
+            elif disable_checks:
+                cursor.execute("SELECT @@FOREIGN_KEY_CHECKS, @@UNIQUE_CHECKS")
+                foreign_key_checks, unique_checks = cursor.fetchone()
+                enable = [f"ALTER TABLE {table_name} ENABLE KEYS", f"SET UNIQUE_CHECKS = {unique_checks}",
+                          f"SET FOREIGN_KEY_CHECKS = {foreign_key_checks}"]
+                for statement in ["SET FOREIGN_KEY_CHECKS = 0", "SET UNIQUE_CHECKS = 0",
+                                  f"ALTER TABLE {table_name} DISABLE KEYS"]:
+                    cursor.execute(statement)
+
+            entities = chain((first,), entities) if first is not None else iter(())
+            while chunk := list(islice(entities, chunk_size)):
+                if len(chunk) not in statements:
+                    statements[len(chunk)] = prefix + ", ".join(row for _ in chunk) + suffix
+                with stage("sql.insert") as measured:
+                    cursor.execute(statements[len(chunk)],
+                                   [value for entity in chunk for value in entity.to_sequence()])
+                    measured.add("rows", len(chunk))
+                if commit:
+                    with stage("sql.commit"):
+                        connection.commit()
+                rows += len(chunk)
+                chunks += 1
+        except Exception as error:
+            failure = error
+            connection.rollback()
+            raise
+        finally:
+            try:
+                _restore_checks(cursor, enable, failure)
+            finally:
+                cursor.close()
+
+        return LoadReport(table_name, rows, chunks, time.perf_counter() - start)
 
-        cursor.executemany(get_insert_command(table_name, entities[0].field_names()),
-                           [entity.to_sequence() for entity in entities])
+    @staticmethod
+    def write_entity(entities: Iterable[Entity], connection: MySQLConnection, table_name: str = None,
+                     create: bool = True, entity_type: Type[Entity] = None) -> LoadReport:
+        """
+        Writes entries to a database table (see bulk_load).
 
-        connection.commit()
-        cursor.close()
+        :param entities: the entries
+        :param connection: the database connection
+        :param table_name: the name of the database table
+        :param create: tells whether the table should be created (and a previous instance should be dropped)
+        :param entity_type: the type of entries, it is needed only when the iterable can be empty
+        :return: the report of the load
+        """
+
+        return SQLHandler.bulk_load(entities, connection, table_name=table_name, create=create,
+                                    entity_type=entity_type)
 
     @staticmethod
-    def read_dataset(dataset_type: Type[Dataset], connection: MySQLConnection) -> Dataset:
+    @timed("sql.read_dataset")
+    def read_dataset(dataset_type: Type[Dataset], connection: MySQLConnection | ConnectionPool) -> Dataset:
         """
-        Reads a dataset from a MySQL database.
+        Reads a dataset from a MySQL database. If a connection pool is given, the tables are read concurrently, each on
+        its own pooled connection.
 
         :param dataset_type: the type of the dataset
-        :param connection: the database connection
+        :param connection: the database connection or a pool of connections
         :return: the instance
         """
 
+        strings = string_pool(dataset_type)
+        if isinstance(connection, ConnectionPool):
+            def read_entity(entity_type: Type[Entity]) -> list[Entity]:
+                with connection.connection() as pooled:
+                    return SQLHandler.read_entity(entity_type, pooled, table_name=entity_type.collection_name(),
+                                                  strings=strings)
+
+            with ThreadPoolExecutor(max_workers=len(dataset_type.entity_types())) as executor:
+                return dataset_type.from_sequence(list(executor.map(read_entity, dataset_type.entity_types())),
+                                                  strings=strings)
+
         return dataset_type.from_sequence(
             [
-                SQLHandler.read_entity(entity_type, connection, table_name=entity_type.collection_name())
+                SQLHandler.read_entity(entity_type, connection, table_name=entity_type.collection_name(),
+                                       strings=strings)
                 for entity_type in dataset_type.entity_types()
-            ]
+            ],
+            strings=strings
         )
 
     @staticmethod
-    def write_dataset(dataset: Dataset, connection: MySQLConnection) -> None:
+    @timed("sql.write_dataset")
+    def write_dataset(dataset: Dataset, connection: MySQLConnection | ConnectionPool, chunk_size: int = 1000,
+                      disable_checks: bool = False) -> list[LoadReport]:
         """
-        Writes a dataset to to a MySQL database.
+        Writes a dataset to to a MySQL database. If a connection pool is given, the tables are created one by one, then
+        they are loaded concurrently, each on its own pooled connection (with foreign key checks turned off, since the
+        referenced rows may not be loaded yet).
 
         :param dataset: the dataset instance
-        :param connection: the database connection
-        :return: nothing
+        :param connection: the database connection or a pool of connections
+        :param chunk_size: the number of rows per statement (and transaction)
+        :param disable_checks: tells whether foreign key and unique checks should be turned off during the load
+        :return: the reports of the loads of the tables
         """
 
+        if isinstance(connection, ConnectionPool):
+            with connection.connection() as pooled:
+                cursor = pooled.cursor()
+                for entity_type in (dataset.entity_types()):
+                    cursor.execute(f"DROP TABLE IF EXISTS {entity_type.collection_name()}")
+                for entity_type in reversed(dataset.entity_types()):
+                    cursor.execute(entity_type.create_table().strip().rstrip(";"))
+                pooled.commit()
+                cursor.close()
+
+            def write_entity(entity_type: Type[Entity]) -> LoadReport:
+                with connection.connection() as pooled:
+                    return SQLHandler.bulk_load(dataset.entities()[entity_type], pooled,
+                                                table_name=entity_type.collection_name(), create=False,
+                                                chunk_size=chunk_size, disable_checks=True, entity_type=entity_type)
+
+            with ThreadPoolExecutor(max_workers=len(dataset.entity_types())) as executor:
+                return list(executor.map(write_entity, reversed(dataset.entity_types())))
+
         cursor = connection.cursor()
         for entity_type in (dataset.entity_types()):
             cursor.execute(f"DROP TABLE IF EXISTS {entity_type.collection_name()}")
+        cursor.close()
+
+        return [
+            SQLHandler.bulk_load(dataset.entities()[entity_type], connection, table_name=entity_type.collection_name(),
+                                 chunk_size=chunk_size, disable_checks=disable_checks, entity_type=entity_type)
+            for entity_type in reversed(dataset.entity_types())  # originally not reversed
+        ]
 
-        for entity_type in reversed(dataset.entity_types()): # originally not reversed
-            SQLHandler.write_entity(dataset.entities()[entity_type], connection,
-                                    table_name=entity_type.collection_name())
+    @staticmethod
+    @timed("sql.delete")
+    def delete_keys(entity_type: Type[Entity], keys: Iterable, connection: MySQLConnection, table_name: str = None,
+                    chunk_size: int = 1000, commit: bool = True) -> int:
+        """
+        Deletes rows of a database table by their primary keys, in chunks (every chunk is committed on its own).
+
+        :param entity_type: the type of entries
+        :param keys: the primary keys
+        :param connection: the database connection
+        :param table_name: the name of the database table
+        :param chunk_size: the number of keys per statement (and transaction)
+        :param commit: tells whether the chunks should be committed, otherwise the caller commits the transaction
+        :return: the number of deleted rows
+        """
+
+        table_name = _identifier(table_name if table_name is not None else entity_type.collection_name())
+        placeholder = _placeholder(connection)
+        keys = iter(keys)
+
+        count = 0
+        cursor = connection.cursor()
+        try:
+            while chunk := list(islice(keys, chunk_size)):
+                cursor.execute("DELETE FROM {table} WHERE {key} IN ({values})".format(
+                    table=table_name, key=entity_type.field_names()[0],
+                    values=", ".join(placeholder for _ in chunk)), chunk)
+                if commit:
+                    connection.commit()
+                count += cursor.rowcount
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+        return count
+
+    @staticmethod
+    @timed("sql.write_changes")
+    def write_changes(dataset: Dataset, connection: MySQLConnection | ConnectionPool, chunk_size: int = 1000,
+                      clear: bool = True) -> list[LoadReport]:
+        """
+        Writes the changes of a dataset with change tracking (like CompanyDataset) to the database of its last write,
+        without recreating the tables. The foreign keys stay valid at every statement: the added and modified entities
+        are upserted first (referenced tables first), then the deleted rows are deleted (referencing tables first). The
+        rows of a replaced collection are all upserted, and the rows which are not in the collection any more are
+        deleted. The changes are written in a single transaction, which is rolled back if any statement fails.
+
+        :param dataset: the dataset instance
+        :param connection: the database connection or a pool of connections
+        :param chunk_size: the number of rows (or keys) per statement
+        :param clear: tells whether the changes should be cleared afterwards
+        :return: the reports of the upserts of the changed tables
+        """
+
+        if isinstance(connection, ConnectionPool):
+            with connection.connection() as pooled:
+                return SQLHandler.write_changes(dataset, pooled, chunk_size=chunk_size, clear=clear)
+
+        try:
+            reports = [
+                SQLHandler.bulk_load(_dirty_entities(dataset, entity_type), connection,
+                                     table_name=entity_type.collection_name(), create=False, chunk_size=chunk_size,
+                                     entity_type=entity_type, upsert=True, commit=False)
+                for entity_type in reversed(dataset.entity_types())
+                if dataset.changes(entity_type).replaced or dataset.changes(entity_type).dirty()
+            ]
+            for entity_type in dataset.entity_types():
+                change_set = dataset.changes(entity_type)
+                deleted = change_set.deleted
+                if change_set.replaced:
+                    key_name = entity_type.field_names()[0]
+                    keys = {getattr(entity, key_name) for entity in dataset.entities()[entity_type]}
+                    deleted = [row[0] for row in SQLHandler.iter_rows(entity_type.collection_name(), connection,
+                                                                      columns=(key_name,)) if row[0] not in keys]
+                if deleted:
+                    SQLHandler.delete_keys(entity_type, deleted, connection, chunk_size=chunk_size, commit=False)
+            with stage("sql.commit"):
+                connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+        if clear:
+            dataset.clear_changes()
+        return reports
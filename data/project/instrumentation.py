@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_enabled = False
+_lock = threading.Lock()
+_stages: dict[str, StageStats] = {}
+_profiler = None
+_memory = False
+# the peaks of the enclosing stages of every thread, which tracemalloc.reset_peak would lose otherwise
+_peaks = threading.local()
+
+
+@dataclass(slots=True)
+class StageStats:
+    """
+    The accumulated measurements of a stage: the number of calls, the total time (of nested stages as well), the
+    counters (like rows, bytes or batches), and the peak of the traced memory when memory tracing is on.
+    """
+    calls: int = 0
+    seconds: float = 0.0
+    counters: dict[str, int] = field(default_factory=dict)
+    peak_bytes: int = 0
+
+    def to_dict(self) -> dict:
+        return {"calls": self.calls, "seconds": self.seconds, "counters": dict(self.counters),
+                "peak_bytes": self.peak_bytes}
+
+
+def enabled() -> bool:
+    """
+    Tells whether the instrumentation is enabled.
+
+    :return: the result
+    """
+    return _enabled
+
+
+def enable(profile: bool = False, memory: bool = False) -> None:
+    """
+    Enables the instrumentation. The stages are only measured while it is enabled, otherwise the instrumented code
+    runs as it would without instrumentation (apart from a check of a flag per call).
+
+    :param profile: tells whether every function call should be profiled with cProfile as well
+    :param memory: tells whether the peak of the allocated memory of every stage should be traced with tracemalloc
+        (the peak of a stage includes the peaks of the stages nested in it)
+    :return: nothing
+    """
+    global _enabled, _profiler, _memory
+    if profile and _profiler is None:
+        import cProfile
+
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    if memory and not _memory:
+        import tracemalloc
+
+        tracemalloc.start()
+        _memory = True
+    _enabled = True
+
+
+def disable() -> None:
+    """
+    Disables the instrumentation, and stops the profiler and the memory tracing. The collected measurements are kept.
+
+    :return: nothing
+    """
+    global _enabled, _memory
+    _enabled = False
+    if _profiler is not None:
+        _profiler.disable()
+    if _memory:
+        import tracemalloc
+
+        tracemalloc.stop()
+        _memory = False
+
+
+def reset() -> None:
+    """
+    Drops the collected measurements and the profile.
+
+    :return: nothing
+    """
+    global _profiler
+    with _lock:
+        _stages.clear()
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler = None
+        if _enabled:
+            enable(profile=True)
+
+
+def _record(name: str, seconds: float, counters: dict[str, int] = None, peak_bytes: int = 0) -> None:
+    with _lock:
+        stats = _stages.get(name)
+        if stats is None:
+            stats = _stages[name] = StageStats()
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.peak_bytes = max(stats.peak_bytes, peak_bytes)
+        if counters:
+            for counter, value in counters.items():
+                stats.counters[counter] = stats.counters.get(counter, 0) + value
+
+
+def add(name: str, counter: str, value: int = 1) -> None:
+    """
+    Increments a counter of a stage (without counting a call).
+
+    :param name: the name of the stage
+    :param counter: the name of the counter
+    :param value: the increment
+    :return: nothing
+    """
+    if _enabled:
+        with _lock:
+            stats = _stages.get(name)
+            if stats is None:
+                stats = _stages[name] = StageStats()
+            stats.counters[counter] = stats.counters.get(counter, 0) + value
+
+
+class Stage:
+    """
+    A context manager which measures a stage.
+    """
+
+    __slots__ = ("name", "counters", "_start", "_traced")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counters = {}
+        self._start = 0.0
+        self._traced = False
+
+    def add(self, counter: str, value: int = 1) -> None:
+        """
+        Increments a counter of the stage.
+
+        :param counter: the name of the counter
+        :param value: the increment
+        :return: nothing
+        """
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def __enter__(self) -> Stage:
+        if _memory:
+            import tracemalloc
+
+            peaks = _peaks.__dict__.setdefault("stack", [])
+            if peaks:
+                peaks[-1] = max(peaks[-1], tracemalloc.get_traced_memory()[1])
+            peaks.append(0)
+            tracemalloc.reset_peak()
+            self._traced = True
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        seconds = time.perf_counter() - self._start
+        peak = 0
+        if self._traced:
+            import tracemalloc
+
+            peaks = _peaks.stack
+            peak = max(peaks.pop(), tracemalloc.get_traced_memory()[1] if _memory else 0)
+            if peaks:
+                peaks[-1] = max(peaks[-1], peak)
+            self._traced = False
+        _record(self.name, seconds, self.counters, peak)
+
+
+class _NullStage:
+    """
+    The stage which is returned when the instrumentation is disabled, it measures nothing.
+    """
+
+    __slots__ = ()
+
+    def add(self, counter: str, value: int = 1) -> None:
+        pass
+
+    def __enter__(self) -> _NullStage:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str) -> Stage | _NullStage:
+    """
+    Returns a context manager which measures a stage, e.g.
+
+        with stage("csv.write") as s:
+            ...
+            s.add("rows", count)
+
+    :param name: the name of the stage
+    :return: the context manager
+    """
+    return Stage(name) if _enabled else _NULL_STAGE
+
+
+def timed_iterator(name: str, iterator: Iterable[T], counter: str = "rows") -> Iterator[T]:
+    """
+    Measures the time spent producing the items of an iterator (but not the time of consuming them), and counts the
+    items. It should only be applied when the instrumentation is enabled.
+
+    :param name: the name of the stage
+    :param iterator: the iterator
+    :param counter: the name of the counter of the items
+    :return: the measured iterator
+    """
+    iterator = iter(iterator)
+    seconds = 0.0
+    count = 0
+    perf_counter = time.perf_counter
+    try:
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                seconds += perf_counter() - start
+                return
+            seconds += perf_counter() - start
+            count += 1
+            yield item
+    finally:
+        _record(name, seconds, {counter: count})
+
+
+def timed(name: str, counter: str = None) -> Callable[[Callable], Callable]:
+    """
+    Returns a decorator which measures the calls of a function as a stage. Generator functions are measured while
+    they produce their items (optionally counted), not while the items are consumed. When the instrumentation is
+    disabled, the original function is called directly.
+
+    :param name: the name of the stage
+    :param counter: the name of the counter of the items of a generator function
+    :return: the decorator
+    """
+    def decorator(function: Callable) -> Callable:
+        if inspect.isgeneratorfunction(function):
+            @functools.wraps(function)
+            def generator_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return function(*args, **kwargs)
+                return timed_iterator(name, function(*args, **kwargs), counter=counter or "items")
+
+            return generator_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with Stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def stats(top: int = 20) -> dict:
+    """
+    Returns the collected measurements in a machine-readable form.
+
+    :param top: the number of functions of the profile (ordered by their cumulative time)
+    :return: the dictionary of the stages (by their names) and of the profile
+    """
+    with _lock:
+        result = {"stages": {name: stats.to_dict() for name, stats in sorted(_stages.items())}}
+    if _profiler is not None:
+        import pstats
+
+        profile = pstats.Stats(_profiler)
+        functions = sorted(profile.stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+        result["profile"] = [
+            {"function": f"{file_name}:{line}({function_name})", "calls": calls, "total_seconds": total,
+             "cumulative_seconds": cumulative}
+            for (file_name, line, function_name), (_, calls, total, cumulative, _) in functions
+        ]
+    return result
+
+
+def export(path: str, top: int = 20) -> None:
+    """
+    Writes the collected measurements to a JSON file.
+
+    :param path: the path of the file
+    :param top: the number of functions of the profile
+    :return: nothing
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(stats(top), file, indent=2)
+
+
+def report(top: int = 10) -> str:
+    """
+    Returns the collected measurements as a table.
+
+    :param top: the number of functions of the profile
+    :return: the text of the table
+    """
+    result = stats(top)
+    lines = [f"{'stage':<28}{'calls':>8}{'seconds':>12}{'peak MiB':>10}  counters"]
+    for name, stats_of_stage in result["stages"].items():
+        counters = ", ".join(f"{counter}={value}" for counter, value in stats_of_stage["counters"].items())
+        lines.append(f"{name:<28}{stats_of_stage['calls']:>8}{stats_of_stage['seconds']:>12.4f}"
+                     f"{stats_of_stage['peak_bytes'] / 2 ** 20:>10.1f}  {counters}")
+    if "profile" in result:
+        lines.append("")
+        lines.append(f"{'function':<80}{'calls':>10}{'cumulative':>12}")
+        for function in result["profile"]:
+            lines.append(f"{function['function'][-80:]:<80}{function['calls']:>10}"
+                         f"{function['cumulative_seconds']:>12.4f}")
+    return "\n".join(lines)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import sys
+from operator import attrgetter
+from typing import Type, Sequence
+
+from data.project.base import Dataset, Entity
+
+
+class StringPool:
+    """
+    A pool of strings which shares one string object per distinct value, so repeated values (like the foreign keys of
+    the entities) take the memory of their distinct values instead of one string per row. Unlike sys.intern, the pool
+    is released with its last reference. It counts the looked up strings and the memory of the duplicates which have
+    been replaced by their shared instances.
+
+    A pool can be shared by threads (the shared instances are looked up atomically), but then the counters may miss
+    some of the concurrent increments.
+
+    Integer codes with a lookup table are stored by the dictionary-encoded columns of ColumnarCompanyDataset instead
+    (see StringColumn), every column with its own table.
+    """
+
+    __slots__ = ("lookups", "saved_bytes", "_shared")
+
+    def __init__(self):
+        self.lookups = 0
+        self.saved_bytes = 0
+        self._shared: dict[str, str] = {}
+
+    def intern(self, value: str) -> str:
+        """
+        Returns the shared instance of a string.
+
+        :param value: the value
+        :return: the shared instance
+        """
+        self.lookups += 1
+        shared = self._shared.setdefault(value, value)
+        if shared is not value:
+            self.saved_bytes += sys.getsizeof(value)
+        return shared
+
+    def intern_entities(self, entity_type: Type[Entity], entities: Sequence[Entity]) -> None:
+        """
+        Replaces the values of the interned fields (see Entity.interned_fields) of entities by their shared instances.
+
+        :param entity_type: the type of the entities
+        :param entities: the entities
+        :return: nothing
+        """
+        setdefault = self._shared.setdefault
+        getsizeof = sys.getsizeof
+        saved_bytes = 0
+        for name in entity_type.interned_fields():
+            getter = attrgetter(name)
+            for entity in entities:
+                value = getter(entity)
+                shared = setdefault(value, value)
+                if shared is not value:
+                    setattr(entity, name, shared)
+                    saved_bytes += getsizeof(value)
+            self.lookups += len(entities)
+        self.saved_bytes += saved_bytes
+
+    def __len__(self) -> int:
+        return len(self._shared)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the counters of the pool.
+
+        :return: the number of distinct and looked up strings, and the bytes of the replaced duplicates
+        """
+        return {"distinct": len(self._shared), "lookups": self.lookups, "saved_bytes": self.saved_bytes}
+
+
+def string_pool(dataset_type: Type[Dataset]) -> StringPool | None:
+    """
+    Returns the pool which interns the strings of the entities of a dataset while they are read: a new one if the
+    dataset interns its strings (like CompanyDataset), None otherwise (e.g. columnar datasets dictionary-encode them
+    instead).
+
+    :param dataset_type: the type of the dataset
+    :return: the pool or None
+    """
+    return StringPool() if hasattr(dataset_type, "intern_strings") else None
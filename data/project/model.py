@@ -1,33 +1,97 @@
 from __future__ import annotations
 
+import hashlib
 from dataclasses import field, dataclass
 import random
-from typing import Type, cast
-import faker
-from faker import Faker
+from typing import Type, Sequence, cast, TYPE_CHECKING
 from data.project.base import Dataset, Entity
+from data.project.instrumentation import add, stage, timed
+from data.project.interning import StringPool
+
+if TYPE_CHECKING:
+    import numpy as np
+    from faker import Faker
 
 
 # TODO replace this module with your own types
 
+@dataclass(slots=True)
+class ChangeSet:
+    """
+    The changes of a collection since the dataset was last written, by the primary keys of the entities: the added, the
+    modified and the deleted ones. A replaced collection has to be rewritten entirely.
+    """
+    added: set = field(default_factory=set)
+    modified: set = field(default_factory=set)
+    deleted: set = field(default_factory=set)
+    replaced: bool = False
+
+    def dirty(self) -> set:
+        """
+        Returns the keys of the entities which have to be written (added or modified).
+
+        :return: the set of keys
+        """
+        return self.added | self.modified
+
+    def add(self, key) -> None:
+        if key in self.deleted:
+            self.deleted.discard(key)
+            self.modified.add(key)
+        else:
+            self.added.add(key)
+
+    def modify(self, key) -> None:
+        if key not in self.added:
+            self.modified.add(key)
+
+    def delete(self, key) -> None:
+        if key in self.added:
+            self.added.discard(key)
+        else:
+            self.modified.discard(key)
+            self.deleted.add(key)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.deleted or self.replaced)
+
+
 @dataclass
 class CompanyDataset(Dataset):
     people: list[Person]
     jobs: list[Job]
     companies: list[Company]
-
+    _indexes: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _changes: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _strings: StringPool | None = field(default=None, init=False, repr=False, compare=False)
 
     @staticmethod
     def entity_types() -> list[Type[Entity]]:
         return [Person, Job, Company]
 
     @staticmethod
-    def from_sequence(entities: list[list[Entity]]) -> Dataset:
-        return CompanyDataset(
+    def from_sequence(entities: list[list[Entity]], strings: StringPool = None) -> Dataset:
+        """
+        Returns an instance from a sequence of entity lists. The repeated strings of the entities are interned: the
+        handlers intern them while they read the rows (see Entity.from_sequence) and pass their pool, otherwise they
+        are interned here (see intern_strings).
+
+        :param entities: the entities
+        :param strings: the pool which has interned the strings of the entities as they were read
+        :return: the instance
+        """
+        dataset = CompanyDataset(
             cast(list[Person], entities[0]),
             cast(list[Job], entities[1]),
             cast(list[Company], entities[2]),
         )
+        if strings is None:
+            dataset.intern_strings()
+        else:
+            add("intern", "strings", strings.lookups)
+            add("intern", "saved_bytes", strings.saved_bytes)
+            dataset._strings = strings
+        return dataset
 
     def entities(self) -> dict[Type[Entity], list[Entity]]:
         res = dict()
@@ -38,113 +102,342 @@ class CompanyDataset(Dataset):
 
         return res
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in ("people", "jobs", "companies"):
+            self.invalidate_indexes()
+            if hasattr(self, "_changes"):
+                self.changes(_COLLECTIONS[name]).replaced = True
+
+    def changes(self, entity_type: Type[Entity]) -> ChangeSet:
+        """
+        Returns the changes of a collection since the dataset was created (or the changes were last cleared). Changes
+        made by add, remove and update are tracked; in-place modifications of entities have to be recorded with
+        mark_modified.
+
+        :param entity_type: the type of entities
+        :return: the changes
+        """
+        return self._changes.setdefault(entity_type, ChangeSet())
+
+    def has_changes(self) -> bool:
+        """
+        Tells whether the dataset has changed since it was created (or the changes were last cleared).
+
+        :return: the result
+        """
+        return any(self._changes.values())
+
+    def clear_changes(self) -> None:
+        """
+        Forgets the tracked changes, it should be called when the dataset has been written.
+
+        :return: nothing
+        """
+        self._changes = {}
+
+    def mark_modified(self, entity: Entity) -> None:
+        """
+        Records an in-place modification of an entity (other than its primary key).
+
+        :param entity: the entity
+        :return: nothing
+        """
+        self.changes(type(entity)).modify(entity.to_sequence()[0])
+
+    def intern_strings(self, strings: StringPool = None) -> StringPool:
+        """
+        Shares one string object per distinct value of the repeated fields (see Entity.interned_fields), e.g. a job
+        name is stored once instead of once per person. The entities added or updated later are interned with the same
+        pool. The memory of the replaced duplicates is counted by the pool, and by the "intern" stage of the
+        instrumentation.
+
+        :param strings: the pool of the interned strings, a new one by default
+        :return: the pool
+        """
+        strings = strings if strings is not None else StringPool()
+        with stage("intern") as measured:
+            lookups, saved_bytes = strings.lookups, strings.saved_bytes
+            for entity_type, entities in self.entities().items():
+                strings.intern_entities(entity_type, entities)
+            measured.add("strings", strings.lookups - lookups)
+            measured.add("saved_bytes", strings.saved_bytes - saved_bytes)
+        self._strings = strings
+        return strings
+
+    def strings(self) -> StringPool | None:
+        """
+        Returns the pool of the interned strings.
+
+        :return: the pool, or None if the strings have not been interned
+        """
+        return self._strings
+
+    def invalidate_indexes(self) -> None:
+        """
+        Drops the cached indexes. Replacing a list of entities, adding or removing entities (by the methods or in
+        place) invalidates the indexes automatically, but in-place modifications of entities or of list elements
+        have to be followed by a call to this method (or update should be used instead).
+
+        :return: nothing
+        """
+        self._indexes = {}
+
+    def _index(self, key: tuple, entity_type: Type[Entity], build) -> dict:
+        """
+        Returns a cached index, builds it when it is missing or when the list of entities has changed.
+
+        :param key: the key of the index in the cache
+        :param entity_type: the type of the indexed entities
+        :param build: the function which builds the index from the list of entities
+        :return: the index
+        """
+        entities = self.entities()[entity_type]
+        signature = (id(entities), len(entities))
+        cached = self._indexes.get(key)
+        if cached is None or cached[0] != signature:
+            cached = self._indexes[key] = (signature, build(entities))
+        return cached[1]
+
+    def index(self, entity_type: Type[Entity]) -> dict[object, Entity]:
+        """
+        Returns the primary key index of a type: the dictionary of entities by their primary keys.
+
+        :param entity_type: the type of entities
+        :return: the index
+        """
+        key_name = entity_type.field_names()[0]
+        return self._index(("primary", entity_type), entity_type,
+                           lambda entities: {getattr(entity, key_name): entity for entity in entities})
+
+    def foreign_index(self, entity_type: Type[Entity], field_name: str) -> dict[object, list[int]]:
+        """
+        Returns a foreign key index of a type: the positions of entities (in their list) by the values of a field.
+
+        :param entity_type: the type of entities
+        :param field_name: the name of the field
+        :return: the index
+        """
+        def build(entities: list[Entity]) -> dict[object, list[int]]:
+            index = {}
+            for i, entity in enumerate(entities):
+                index.setdefault(getattr(entity, field_name), []).append(i)
+            return index
+
+        return self._index(("foreign", entity_type, field_name), entity_type, build)
+
+    def companies_by_name(self) -> dict[str, Company]:
+        return cast(dict[str, Company], self.index(Company))
+
+    def jobs_by_name(self) -> dict[str, Job]:
+        return cast(dict[str, Job], self.index(Job))
+
+    def people_by_company(self) -> dict[str, list[int]]:
+        return self.foreign_index(Person, "company_name")
+
+    def company_of(self, person: Person) -> Company | None:
+        return self.companies_by_name().get(person.company_name)
+
+    def job_of(self, person: Person) -> Job | None:
+        return self.jobs_by_name().get(person.job_name)
+
+    def add(self, entity: Entity) -> None:
+        """
+        Adds an entity to the dataset.
+
+        :param entity: the entity
+        :return: nothing
+        """
+        if self._strings is not None:
+            self._strings.intern_entities(type(entity), (entity,))
+        self.entities()[type(entity)].append(entity)
+        self.invalidate_indexes()
+        self.changes(type(entity)).add(entity.to_sequence()[0])
+
+    def remove(self, entity: Entity) -> None:
+        """
+        Removes an entity from the dataset.
+
+        :param entity: the entity
+        :return: nothing
+        """
+        self.entities()[type(entity)].remove(entity)
+        self.invalidate_indexes()
+        self.changes(type(entity)).delete(entity.to_sequence()[0])
+
+    def update(self, entity: Entity, **changes) -> None:
+        """
+        Modifies the fields of an entity of the dataset.
+
+        :param entity: the entity
+        :param changes: the new values by field names
+        :return: nothing
+        """
+        key = entity.to_sequence()[0]
+        for name, value in changes.items():
+            setattr(entity, name, value)
+        if self._strings is not None:
+            self._strings.intern_entities(type(entity), (entity,))
+        self.invalidate_indexes()
+
+        change_set = self.changes(type(entity))
+        if entity.to_sequence()[0] != key:
+            change_set.delete(key)
+            change_set.add(entity.to_sequence()[0])
+        else:
+            change_set.modify(key)
+
     @staticmethod
+    @timed("generate")
     def generate(
             count_of_employees: int,
             count_of_jobs: int,
-            count_of_companies: int):
-
-        def generate_people(n: int, male_ratio: float = 0.5, locale: str = "en_US",
-                            unique: bool = False, min_age: int = 18, max_age: int = 60) -> list[Person]:
-            assert n > 0
-            assert 0 <= male_ratio <= 1
-            assert 0 <= min_age <= max_age
-
-            fake = Faker(locale)
-            people = []
-            for i in range(n):
-                male = random.random() < male_ratio
-                generator = fake if not unique else fake.unique
-                people.append(Person(
-                    "P-" + (str(i).zfill(6)),
-                    generator.name_male() if male else generator.name_female(),
-                    random.randint(min_age, max_age),
-                    male))
-
-            return people
-
-        def generate_jobs(n: int, min_salary: int = 2000, max_salary: int = 4500) -> list[Job]:
-            assert n > 0
-            assert 2000 <= min_salary
-            assert min_salary <= max_salary <= 4500
-
-            pay_grades = [1, 2, 3, 4]
-
-            fake_type = Faker()
-            fake_type.add_provider(faker.providers.job)
-
-            jobs = []
-            for i in range(n):
-                salary = random.randint(min_salary, max_salary)
-                ind = random.randint(pay_grades[0], pay_grades[3])
-                job = Job(
-                    fake_type.job(),
-                    salary,
-                    pay_grades[ind - 1])
-                if job.pay_grade == 2:
-                    job.salary = int(salary * 1.2)
-                elif job.pay_grade == 3:
-                    job.salary = int(salary * 1.2 * 1.4)
-                elif job.pay_grade == 4:
-                    job.salary = int(salary * 1.2 * 1.4 * 1.6)
-                jobs.append(job)
-
-            return jobs
-
-        def generate_companies(n: int, attempts: int = None) -> list[Company]:
-            assert n > 0
-            assert attempts is None or attempts >= n
-
-            codes = {"cs_CZ":"Czech Republic", "da_DK":"Denmark", "de_AT":"Austria", "de_CH":"Switzerland","de_DE":"Germany",
-                     "el_GR":"Greece","en_AU":"Australia",
-                     "en_CA":"Canada", "en_GB":"United Kingdom", "en_IE":"Ireland", "en_IN":"India","en_NZ":"New Zealand",
-                     "en_PH":"Philippines", "en_US":"United States", "es_CO":"Colombia", "es_ES":"Spain",
-                     "es_MX":"Mexico","fa_IR":"IR", "fi_FI":"Finland", "fil_PH":"Philippines", "fr_CH":"Switzerland",
-                     "fr_FR":"France", "he_IL":"Israel", "hi_IN":"India", "hr_HR":"Croatia",
-                     "hu_HU":"Hungary","hy_AM":"Armenia", "id_ID":"Indonesia","it_IT":"Italy","ja_JP":"Japan",
-                     "ka_GE":"Georgia", "ko_KR":"Republic of Korea","ne_NP":"Nepal", "nl_BE":"Belgium", "nl_NL":"Netherlands",
-                     "no_NO":"Norway", "pl_PL":"Poland", "pt_BR":"Brazil", "pt_PT":"Portugal", "ro_RO":"Romania",
-                     "ru_RU":"Russia", "sk_SK":"Slovakia","sl_SI":"Slovenia", "sv_SE":"Sweden",
-                     "ta_IN":"India", "th_TH":"Thailand", "tl_PH":"Philippines", "uk_UA":"Ukraine", "zh_CN":"Switzerland"
-                    , "zh_TW":"Taiwan"}
-
-            loc_list = list(codes.keys())
-
-            fake = Faker()
-            fake.add_provider(faker.providers.company)
-            fake.add_provider(faker.providers.address)
-
-            companies = []
-            for i in range(n if attempts is None else attempts):
-                locale = loc_list[random.randint(0,49)]
-                fake = Faker(locale)
-                company = Company(
-                    fake.company(),
-                    str(fake.address()),
-                    fake.catch_phrase(),
-                    codes[locale]
-                )
-
-                companies.append(company)
-
-            return companies
-
-        people = generate_people(count_of_employees)
-        jobs = generate_jobs(count_of_jobs)
-        companies = generate_companies(count_of_companies)
-        for i in range(len(people)):
-            person = people[i]
-            person.job_name = jobs[random.randint(0,len(jobs)-1)].name
-            person.company_name = companies[random.randint(0,len(companies)-1)].name
+            count_of_companies: int,
+            seed: int | str = None,
+            workers: int = 1,
+            chunk_size: int = 10000,
+            vectorized: bool = False):
+        """
+        Generates a dataset. The entities are generated in chunks, every chunk has its own seed which is derived from
+        the given one, so the output only depends on the seed (and the chunk size), but not on the number of workers.
+
+        :param count_of_employees: the number of people
+        :param count_of_jobs: the number of jobs
+        :param count_of_companies: the number of companies
+        :param seed: the seed of the generation, a random one is used when it is omitted
+        :param workers: the number of processes, the chunks are generated in a process pool if it is greater than 1
+        :param chunk_size: the maximal number of entities generated by a chunk
+        :param vectorized: tells whether the numeric columns should be drawn in bulk (see generate_columns)
+        :return: the instance
+        """
+        assert count_of_employees > 0 and count_of_jobs > 0 and count_of_companies > 0
+        assert workers is None or workers > 0
+        assert chunk_size > 0
+
+        if vectorized:
+            columns = CompanyDataset.generate_columns(count_of_employees, count_of_jobs, count_of_companies,
+                                                      seed=seed, workers=workers, chunk_size=chunk_size)
+            with stage("generate.materialize"):
+                return CompanyDataset(*[_materialize(entity_type, columns[entity_type])
+                                        for entity_type in CompanyDataset.entity_types()])
+
+        seed = seed if seed is not None else random.getrandbits(64)
+        people_chunks = _chunks(count_of_employees, chunk_size)
+        job_chunks = _chunks(count_of_jobs, chunk_size)
+        company_chunks = _chunks(count_of_companies, chunk_size)
+        with stage("generate.chunks") as measured:
+            results = _run_tasks([
+                *[(_generate_people, start, n, f"{seed}:people:{start}") for start, n in people_chunks],
+                *[(_generate_jobs, n, f"{seed}:jobs:{start}") for start, n in job_chunks],
+                *[(_generate_companies, n, f"{seed}:companies:{start}") for start, n in company_chunks],
+            ], workers)
+            measured.add("batches", len(results))
+            measured.add("rows", count_of_employees + count_of_jobs + count_of_companies)
+
+        people = [person for result in results[:len(people_chunks)] for person in result]
+        jobs = [job for result in results[len(people_chunks):-len(company_chunks)] for job in result]
+        companies = [company for result in results[-len(company_chunks):] for company in result]
+
+        with stage("generate.assignment"):
+            rng = random.Random(f"{seed}:assignment")
+            job_names = [job.name for job in jobs]
+            company_names = [company.name for company in companies]
+            for person in people:
+                person.job_name = rng.choice(job_names)
+                person.company_name = rng.choice(company_names)
 
         return CompanyDataset(people, jobs, companies)
 
+    @staticmethod
+    @timed("generate.columns")
+    def generate_columns(
+            count_of_employees: int,
+            count_of_jobs: int,
+            count_of_companies: int,
+            seed: int | str = None,
+            workers: int = 1,
+            chunk_size: int = 10000) -> dict[Type[Entity], dict[str, np.ndarray]]:
+        """
+        Generates a dataset in columnar form. The ages, genders, salaries, pay grades and the assignments of people to
+        jobs and companies are drawn as NumPy arrays in bulk, only the texts are generated by Faker (in chunks, like in
+        generate). String columns are object arrays which share the string instances.
+
+        Note that the output differs from the output of generate for the same seed.
+
+        :param count_of_employees: the number of people
+        :param count_of_jobs: the number of jobs
+        :param count_of_companies: the number of companies
+        :param seed: the seed of the generation, a random one is used when it is omitted
+        :param workers: the number of processes, the texts are generated in a process pool if it is greater than 1
+        :param chunk_size: the maximal number of texts generated by a chunk
+        :return: the columns (by names) of each entity type
+        """
+        import numpy as np
+
+        assert count_of_employees > 0 and count_of_jobs > 0 and count_of_companies > 0
+        assert workers is None or workers > 0
+        assert chunk_size > 0
+
+        seed = seed if seed is not None else random.getrandbits(64)
+        rng = np.random.default_rng(int.from_bytes(hashlib.sha256(str(seed).encode()).digest()[:8], "little"))
+
+        males = rng.random(count_of_employees) < 0.5
+        ages = rng.integers(18, 60, size=count_of_employees, endpoint=True)
+        pay_grades = rng.integers(1, 4, size=count_of_jobs, endpoint=True)
+        salaries = rng.integers(2000, 4500, size=count_of_jobs, endpoint=True).astype(np.float64)
+        for pay_grade, multiplier in ((2, 1.2), (3, 1.4), (4, 1.6)):
+            salaries = np.where(pay_grades >= pay_grade, salaries * multiplier, salaries)
+        job_indices = rng.integers(0, count_of_jobs, size=count_of_employees)
+        company_indices = rng.integers(0, count_of_companies, size=count_of_employees)
+
+        people_chunks = _chunks(count_of_employees, chunk_size)
+        job_chunks = _chunks(count_of_jobs, chunk_size)
+        company_chunks = _chunks(count_of_companies, chunk_size)
+        results = _run_tasks([
+            *[(_generate_names, males[start:start + n].tolist(), f"{seed}:people:{start}")
+              for start, n in people_chunks],
+            *[(_generate_job_names, n, f"{seed}:jobs:{start}") for start, n in job_chunks],
+            *[(_generate_companies, n, f"{seed}:companies:{start}") for start, n in company_chunks],
+        ], workers)
+
+        def strings(values: list[str]) -> np.ndarray:
+            array = np.empty(len(values), dtype=object)
+            array[:] = values
+            return array
+
+        names = strings([name for result in results[:len(people_chunks)] for name in result])
+        job_names = strings([name for result in results[len(people_chunks):-len(company_chunks)] for name in result])
+        companies = [company for result in results[-len(company_chunks):] for company in result]
+        company_names = strings([company.name for company in companies])
+
+        return {
+            Person: {
+                "id": strings(["P-" + (str(i).zfill(6)) for i in range(count_of_employees)]),
+                "name": names,
+                "age": ages,
+                "male": males,
+                "job_name": job_names[job_indices],
+                "company_name": company_names[company_indices],
+            },
+            Job: {
+                "name": job_names,
+                "salary": salaries.astype(np.int64),
+                "pay_grade": pay_grades,
+            },
+            Company: {
+                "name": company_names,
+                "address": strings([company.address for company in companies]),
+                "motto": strings([company.motto for company in companies]),
+                "country": strings([company.country for company in companies]),
+            },
+        }
+
     @staticmethod
     def field_names() -> list[str]:
         return ["employee", "job", "company"]
 
 
-@dataclass
+@dataclass(slots=True)
 class Company(Entity):
     name: str = field(hash=True)
     address: str = field(repr=True, compare =False)
@@ -152,15 +445,21 @@ class Company(Entity):
     country : str = field(repr=True, compare=False)
 
     @staticmethod
-    def from_sequence(seq: list[str]) -> Company:
-        return Company(seq[0], seq[1], seq[2], seq[3])
+    def from_sequence(seq: Sequence, strings: StringPool = None) -> Company:
+        if strings is None:
+            return Company(seq[0], seq[1], seq[2], seq[3])
+        return Company(strings.intern(seq[0]), seq[1], seq[2], strings.intern(seq[3]))
 
-    def to_sequence(self) -> list[str]:
-        return [self.name, self.address, self.motto, self.country]
+    def to_sequence(self) -> tuple:
+        return self.name, self.address, self.motto, self.country
 
     @staticmethod
-    def field_names() -> list[str]:
-        return ["name", "address", "motto", "country"]
+    def field_names() -> tuple[str, ...]:
+        return _COMPANY_FIELDS
+
+    @staticmethod
+    def interned_fields() -> tuple[str, ...]:
+        return "name", "country"
 
     @staticmethod
     def collection_name() -> str:
@@ -178,22 +477,26 @@ class Company(Entity):
         """
 
 
-@dataclass
+@dataclass(slots=True)
 class Job(Entity):
     name: str = field(hash=True)
     salary: int = field(repr=True, compare=False)
     pay_grade: int = field(repr=True, compare=False)
 
     @staticmethod
-    def from_sequence(seq: list[str]) -> Job:
-        return Job(seq[0], int(seq[1]), int(seq[2]))
+    def from_sequence(seq: Sequence, strings: StringPool = None) -> Job:
+        return Job(seq[0] if strings is None else strings.intern(seq[0]), int(seq[1]), int(seq[2]))
 
-    def to_sequence(self) -> list[str]:
-        return [self.name, str(self.salary), str(self.pay_grade)]
+    def to_sequence(self) -> tuple:
+        return self.name, self.salary, self.pay_grade
 
     @staticmethod
-    def field_names() -> list[str]:
-        return ["name", "salary", "pay_grade"]
+    def field_names() -> tuple[str, ...]:
+        return _JOB_FIELDS
+
+    @staticmethod
+    def interned_fields() -> tuple[str, ...]:
+        return "name",
 
     @staticmethod
     def collection_name() -> str:
@@ -210,7 +513,7 @@ class Job(Entity):
         """
 
 
-@dataclass
+@dataclass(slots=True)
 class Person(Entity):
     id: str = field(hash=True)
     name: str = field(repr=True, compare=False)
@@ -221,15 +524,22 @@ class Person(Entity):
 
 
     @staticmethod
-    def from_sequence(seq: list[str]) -> Person:
-        return Person(seq[0], seq[1], int(seq[2]),bool(seq[3]),seq[4], seq[5])
+    def from_sequence(seq: Sequence, strings: StringPool = None) -> Person:
+        if strings is None:
+            return Person(seq[0], seq[1], int(seq[2]), _parse_bool(seq[3]), seq[4], seq[5])
+        return Person(seq[0], seq[1], int(seq[2]), _parse_bool(seq[3]), strings.intern(seq[4]),
+                      strings.intern(seq[5]))
 
-    def to_sequence(self) -> list[str]:
-        return [self.id, self.name, str(self.age), str(int(self.male)), self.job_name,self.company_name]
+    def to_sequence(self) -> tuple:
+        return self.id, self.name, self.age, self.male, self.job_name, self.company_name
 
     @staticmethod
-    def field_names() -> list[str]:
-        return ["id", "name", "age",  "male", "job_name", "company_name"]
+    def field_names() -> tuple[str, ...]:
+        return _PERSON_FIELDS
+
+    @staticmethod
+    def interned_fields() -> tuple[str, ...]:
+        return "job_name", "company_name"
 
     @staticmethod
     def collection_name() -> str:
@@ -250,3 +560,181 @@ class Person(Entity):
             FOREIGN KEY (company_name) REFERENCES {Company.collection_name()}(name)
         );
         """
+
+
+_COLLECTIONS = {"people": Person, "jobs": Job, "companies": Company}
+
+_COMPANY_FIELDS = ("name", "address", "motto", "country")
+_JOB_FIELDS = ("name", "salary", "pay_grade")
+_PERSON_FIELDS = ("id", "name", "age", "male", "job_name", "company_name")
+
+
+def _parse_bool(value) -> bool:
+    """
+    Converts a stored value to bool. Unlike bool(), it treats the textual forms "0" and "False" as False.
+
+    :param value: the value (a bool, a number or a string)
+    :return: the converted value
+    """
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true")
+    return bool(value)
+
+
+_COUNTRIES = {"cs_CZ": "Czech Republic", "da_DK": "Denmark", "de_AT": "Austria", "de_CH": "Switzerland",
+              "de_DE": "Germany", "el_GR": "Greece", "en_AU": "Australia", "en_CA": "Canada",
+              "en_GB": "United Kingdom", "en_IE": "Ireland", "en_IN": "India", "en_NZ": "New Zealand",
+              "en_PH": "Philippines", "en_US": "United States", "es_CO": "Colombia", "es_ES": "Spain",
+              "es_MX": "Mexico", "fa_IR": "IR", "fi_FI": "Finland", "fil_PH": "Philippines", "fr_CH": "Switzerland",
+              "fr_FR": "France", "he_IL": "Israel", "hi_IN": "India", "hr_HR": "Croatia", "hu_HU": "Hungary",
+              "hy_AM": "Armenia", "id_ID": "Indonesia", "it_IT": "Italy", "ja_JP": "Japan", "ka_GE": "Georgia",
+              "ko_KR": "Republic of Korea", "ne_NP": "Nepal", "nl_BE": "Belgium", "nl_NL": "Netherlands",
+              "no_NO": "Norway", "pl_PL": "Poland", "pt_BR": "Brazil", "pt_PT": "Portugal", "ro_RO": "Romania",
+              "ru_RU": "Russia", "sk_SK": "Slovakia", "sl_SI": "Slovenia", "sv_SE": "Sweden", "ta_IN": "India",
+              "th_TH": "Thailand", "tl_PH": "Philippines", "uk_UA": "Ukraine", "zh_CN": "Switzerland",
+              "zh_TW": "Taiwan"}
+
+_fakers: dict[str, Faker] = {}
+
+
+def get_faker(locale: str = "en_US") -> Faker:
+    """
+    Returns the Faker instance of a locale. The instances are expensive to create, so they are cached (per process).
+
+    :param locale: the locale
+    :return: the instance
+    """
+    fake = _fakers.get(locale)
+    if fake is None:
+        from faker import Faker
+
+        fake = _fakers[locale] = Faker(locale)
+    return fake
+
+
+def _run_tasks(tasks: list[tuple], workers: int = 1) -> list:
+    """
+    Executes (function, *arguments) tasks, in a process pool when more than one worker is requested.
+
+    :param tasks: the tasks
+    :param workers: the number of processes (None means the number of processors)
+    :return: the list of results in the order of the tasks
+    """
+    if workers is None or workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return [future.result() for future in [executor.submit(*task) for task in tasks]]
+    return [task[0](*task[1:]) for task in tasks]
+
+
+def _materialize(entity_type: Type[Entity], columns: dict[str, np.ndarray]) -> list[Entity]:
+    """
+    Creates the entities from the columns of their fields.
+
+    :param entity_type: the type of entities
+    :param columns: the columns by field names
+    :return: the list of entities
+    """
+    return [entity_type(*values) for values in zip(*[columns[name].tolist() for name in entity_type.field_names()])]
+
+
+def _chunks(n: int, chunk_size: int) -> list[tuple[int, int]]:
+    """
+    Splits a range of n elements into chunks.
+
+    :param n: the number of elements
+    :param chunk_size: the maximal size of a chunk
+    :return: the list of (start, size) pairs
+    """
+    return [(start, min(chunk_size, n - start)) for start in range(0, n, chunk_size)]
+
+
+def _generate_people(start: int, n: int, seed: int | str, male_ratio: float = 0.5, locale: str = "en_US",
+                     unique: bool = False, min_age: int = 18, max_age: int = 60) -> list[Person]:
+    assert n > 0
+    assert 0 <= male_ratio <= 1
+    assert 0 <= min_age <= max_age
+
+    rng = random.Random(seed)
+    fake = get_faker(locale)
+    fake.seed_instance(seed)
+    if unique:
+        fake.unique.clear()
+    generator = fake if not unique else fake.unique
+
+    people = []
+    for i in range(start, start + n):
+        male = rng.random() < male_ratio
+        people.append(Person(
+            "P-" + (str(i).zfill(6)),
+            generator.name_male() if male else generator.name_female(),
+            rng.randint(min_age, max_age),
+            male))
+
+    return people
+
+
+def _generate_jobs(n: int, seed: int | str, min_salary: int = 2000, max_salary: int = 4500) -> list[Job]:
+    assert n > 0
+    assert 2000 <= min_salary
+    assert min_salary <= max_salary <= 4500
+
+    pay_grades = [1, 2, 3, 4]
+
+    rng = random.Random(seed)
+    fake_type = get_faker()
+    fake_type.seed_instance(seed)
+
+    jobs = []
+    for i in range(n):
+        salary = rng.randint(min_salary, max_salary)
+        ind = rng.randint(pay_grades[0], pay_grades[3])
+        job = Job(
+            fake_type.job(),
+            salary,
+            pay_grades[ind - 1])
+        if job.pay_grade == 2:
+            job.salary = int(salary * 1.2)
+        elif job.pay_grade == 3:
+            job.salary = int(salary * 1.2 * 1.4)
+        elif job.pay_grade == 4:
+            job.salary = int(salary * 1.2 * 1.4 * 1.6)
+        jobs.append(job)
+
+    return jobs
+
+
+def _generate_names(males: list[bool], seed: int | str, locale: str = "en_US") -> list[str]:
+    fake = get_faker(locale)
+    fake.seed_instance(seed)
+    return [fake.name_male() if male else fake.name_female() for male in males]
+
+
+def _generate_job_names(n: int, seed: int | str) -> list[str]:
+    fake = get_faker()
+    fake.seed_instance(seed)
+    return [fake.job() for _ in range(n)]
+
+
+def _generate_companies(n: int, seed: int | str) -> list[Company]:
+    assert n > 0
+
+    rng = random.Random(seed)
+    loc_list = list(_COUNTRIES.keys())
+
+    companies = []
+    for i in range(n):
+        locale = rng.choice(loc_list)
+        fake = get_faker(locale)
+        fake.seed_instance(rng.getrandbits(64))
+        company = Company(
+            fake.company(),
+            str(fake.address()),
+            fake.catch_phrase(),
+            _COUNTRIES[locale]
+        )
+
+        companies.append(company)
+
+    return companies
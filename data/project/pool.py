@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Any
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of database connections. Connections are opened lazily by a backend (a function which opens a
+    new connection) when they are first needed, and they are reused after they are released.
+    """
+
+    def __init__(self, backend: Callable[[], Any], max_size: int = 4):
+        """
+        Creates a pool. No connection is opened here.
+
+        :param backend: the function which opens a new connection
+        :param max_size: the maximal number of open connections
+        """
+        assert max_size > 0
+
+        self.backend = backend
+        self.max_size = max_size
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        """
+        Returns the number of open connections.
+
+        :return: the number
+        """
+        return self._size
+
+    def acquire(self) -> Any:
+        """
+        Returns an idle connection, opens a new one if there is none, or waits for a connection to be released if the
+        pool is full.
+
+        :return: the connection
+        """
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("the connection pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                self._condition.wait()
+
+        try:
+            return self.backend()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, connection: Any) -> None:
+        """
+        Gives back a connection to the pool.
+
+        :param connection: the connection
+        :return: nothing
+        """
+        with self._condition:
+            if self._closed:
+                self._size -= 1
+                connection.close()
+            else:
+                self._idle.append(connection)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """
+        Acquires a connection for the time of a with block.
+
+        :return: the context manager of the connection
+        """
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self) -> None:
+        """
+        Closes the idle connections. The connections in use are closed when they are released.
+
+        :return: nothing
+        """
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                self._size -= 1
+                self._idle.pop().close()
+            self._condition.notify_all()
+
+
+def mysql_backend(host: str, user: str, password: str, database: str) -> Callable[[], Any]:
+    """
+    Returns a backend which opens MySQL connections.
+
+    :param host: the host of the server
+    :param user: the name of the user
+    :param password: the password of the user
+    :param database: the name of the database
+    :return: the backend
+    """
+
+    def connect():
+        import mysql.connector
+
+        return mysql.connector.connect(host=host, user=user, passwd=password, database=database)
+
+    return connect
+
+
+def sqlite_backend(path: str) -> Callable[[], Any]:
+    """
+    Returns a backend which opens connections to an SQLite database. It can be used as a local stand-in for MySQL.
+
+    :param path: the path of the database file
+    :return: the backend
+    """
+    return lambda: sqlite3.connect(path, check_same_thread=False, timeout=60)
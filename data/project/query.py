@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from typing import Type, Iterable, Any
+
+import numpy as np
+
+from data.project.base import Dataset, Entity
+from data.project.model import Person, Job, Company
+
+
+def column(dataset: Dataset, entity_type: Type[Entity], name: str) -> Any:
+    """
+    Returns the values of a field of all entities of a type. Columnar datasets return their stored columns, otherwise
+    the values are collected from the entities.
+
+    :param dataset: the dataset
+    :param entity_type: the type of entities
+    :param name: the name of the field
+    :return: the column (an array, a dictionary-encoded column or a list)
+    """
+    if hasattr(dataset, "column"):
+        return dataset.column(entity_type, name)
+    return [getattr(entity, name) for entity in dataset.entities()[entity_type]]
+
+
+def index(dataset: Dataset, entity_type: Type[Entity]) -> dict[object, Entity]:
+    """
+    Returns the primary key index of a type, the cached one if the dataset provides it.
+
+    :param dataset: the dataset
+    :param entity_type: the type of entities
+    :return: the dictionary of entities by their primary keys
+    """
+    if hasattr(dataset, "index"):
+        return dataset.index(entity_type)
+    key_name = entity_type.field_names()[0]
+    return {getattr(entity, key_name): entity for entity in dataset.entities()[entity_type]}
+
+
+def factorize(values: Iterable) -> tuple[np.ndarray, list]:
+    """
+    Encodes values as integer codes. Dictionary-encoded columns are used as they are, other values are hashed in a
+    single pass. The labels are ordered by their first appearance.
+
+    :param values: the values
+    :return: the codes of the values and the list of distinct values (labels)
+    """
+    if hasattr(values, "codes") and hasattr(values, "categories"):
+        return values.codes, list(values.categories)
+    index = {}
+    codes = np.fromiter((index.setdefault(value, len(index)) for value in values), dtype=np.int64)
+    return codes, list(index)
+
+
+def group_count(keys: Iterable) -> tuple[list, np.ndarray]:
+    """
+    Counts the rows of each group.
+
+    :param keys: the group keys of the rows
+    :return: the labels of the groups and the counts
+    """
+    codes, labels = factorize(keys)
+    return labels, np.bincount(codes, minlength=len(labels))
+
+
+def group_sum(keys: Iterable, values: Iterable) -> tuple[list, np.ndarray]:
+    """
+    Sums the values of each group.
+
+    :param keys: the group keys of the rows
+    :param values: the values of the rows
+    :return: the labels of the groups and the sums
+    """
+    codes, labels = factorize(keys)
+    return labels, np.bincount(codes, weights=np.asarray(values, dtype=np.float64), minlength=len(labels))
+
+
+def group_mean(keys: Iterable, values: Iterable) -> tuple[list, np.ndarray]:
+    """
+    Averages the values of each group.
+
+    :param keys: the group keys of the rows
+    :param values: the values of the rows
+    :return: the labels of the groups and the means
+    """
+    codes, labels = factorize(keys)
+    counts = np.bincount(codes, minlength=len(labels))
+    sums = np.bincount(codes, weights=np.asarray(values, dtype=np.float64), minlength=len(labels))
+    return labels, sums / np.maximum(counts, 1)
+
+
+def histogram(values: Iterable, bins: int = None, width: int = 1) -> np.ndarray:
+    """
+    Counts non-negative integer values in bins of equal width: the value v falls into the bin v // width.
+
+    :param values: the values
+    :param bins: the minimal number of bins
+    :param width: the width of a bin
+    :return: the counts by bins
+    """
+    return np.bincount(np.asarray(values, dtype=np.int64) // width, minlength=bins or 0)
+
+
+def avg_age_by_company(dataset: Dataset) -> tuple[list[str], list[int]]:
+    """
+    Computes the (truncated) average age of the employees of each company.
+
+    :param dataset: the dataset
+    :return: the names of the companies and the average ages
+    """
+    labels, means = group_mean(column(dataset, Person, "company_name"), column(dataset, Person, "age"))
+    return labels, means.astype(np.int64).tolist()
+
+
+def employees_by_companies(dataset: Dataset) -> tuple[list[str], list[int]]:
+    """
+    Counts the employees of each company.
+
+    :param dataset: the dataset
+    :return: the names of the companies and the numbers of employees
+    """
+    labels, counts = group_count(column(dataset, Person, "company_name"))
+    return labels, counts.tolist()
+
+
+def distribution_of_paygrades(dataset: Dataset) -> tuple[list[int], list[float]]:
+    """
+    Computes the percentage of jobs in each pay grade.
+
+    :param dataset: the dataset
+    :return: the pay grades (in ascending order) and the percentages
+    """
+    counts = histogram(column(dataset, Job, "pay_grade"))
+    pay_grades = np.flatnonzero(counts)
+    return pay_grades.tolist(), (counts[pay_grades] / counts.sum() * 100).tolist()
+
+
+def genders_by_ages(dataset: Dataset, groups: int = 11) -> np.ndarray:
+    """
+    Counts the people by genders and age groups of 10 years. Older people fall into the last group.
+
+    :param dataset: the dataset
+    :param groups: the number of age groups
+    :return: the matrix of counts, the first row belongs to males, the second one to females
+    """
+    age_groups = np.minimum(np.asarray(column(dataset, Person, "age"), dtype=np.int64) // 10, groups - 1)
+    females = ~np.asarray(column(dataset, Person, "male"), dtype=np.bool_)
+    return histogram(females * groups + age_groups, bins=2 * groups).reshape(2, groups)
+
+
+def salaries_by_jobs_with_limit(dataset: Dataset, limit: float = 0.05) -> tuple[list[str], list[int]]:
+    """
+    Computes the total salary paid for each job (joining people to their jobs). Jobs below the given share of the
+    total are merged into an "other" group.
+
+    :param dataset: the dataset
+    :param limit: the minimal share of a job which is shown on its own
+    :return: the names of the jobs (and "other") and the total salaries
+    """
+    labels, counts = group_count(column(dataset, Person, "job_name"))
+    jobs = index(dataset, Job)
+    salaries = np.array([jobs[label].salary if label in jobs else 0 for label in labels], dtype=np.int64)
+    totals = counts * salaries
+
+    shown = totals >= totals.sum() * limit
+    return [label for label, s in zip(labels, shown) if s] + ["other"], \
+        totals[shown].tolist() + [int(totals[~shown].sum())]
+
+
+def employees_by_countries_and_sexes(dataset: Dataset) -> tuple[list[str], list[int], list[int]]:
+    """
+    Counts the male and female employees by the countries of their companies (joining people to their companies).
+
+    :param dataset: the dataset
+    :return: the countries, the numbers of males and the numbers of females
+    """
+    company_codes, company_names = factorize(column(dataset, Person, "company_name"))
+    companies = index(dataset, Company)
+    country_codes, countries = factorize(
+        [companies[name].country if name in companies else "unknown" for name in company_names])
+    person_countries = country_codes[company_codes]
+    males = np.asarray(column(dataset, Person, "male"), dtype=np.bool_)
+
+    return countries, np.bincount(person_countries[males], minlength=len(countries)).tolist(), \
+        np.bincount(person_countries[~males], minlength=len(countries)).tolist()
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator
+
+from data.project.base import Dataset
+
+_dataset = None
+
+
+@contextmanager
+def headless() -> Iterator[None]:
+    """
+    Switches matplotlib to the non-interactive Agg backend for the time of a with block, then restores the previous
+    backend (or its automatic selection, if no backend had been selected yet). matplotlib is imported here, on first
+    use.
+
+    :return: the context manager
+    """
+    import matplotlib
+
+    # read without resolving it: resolving the automatic selection would load an interactive backend
+    previous = dict.__getitem__(matplotlib.rcParams, "backend")
+    import matplotlib.pyplot as plt
+
+    plt.switch_backend("Agg")
+    try:
+        yield
+    finally:
+        plt.switch_backend(previous)
+
+
+def _render_query(dataset: Dataset, name: str, file_name: str) -> str:
+    """
+    Renders a query to a file (the backend has to be non-interactive).
+
+    :param dataset: the dataset
+    :param name: the name of the query
+    :param file_name: the path of the file
+    :return: the path of the file
+    """
+    import matplotlib.pyplot as plt
+    import data.project.visualization as visualization
+
+    figure = visualization.QUERIES[name](dataset, show=False)
+    try:
+        figure.savefig(file_name)
+    finally:
+        plt.close(figure)
+    return file_name
+
+
+def _initialize_worker(dataset: Dataset) -> None:
+    global _dataset
+    _dataset = dataset
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _render_in_worker(name: str, file_name: str) -> str:
+    return _render_query(_dataset, name, file_name)
+
+
+def render(dataset: Dataset, directory: str, queries: list[str] = None, image_format: str = "png",
+           workers: int = 1) -> list[str]:
+    """
+    Renders queries to image files without displaying them. The files are named after the queries.
+
+    :param dataset: the dataset
+    :param directory: the directory of the files (it is created if it does not exist)
+    :param queries: the names (like "query-1") or the ids (like "1") of the queries, all of them when it is omitted
+    :param image_format: the format of the images (e.g. png or svg)
+    :param workers: the number of processes, the dataset is sent once to each of them
+    :return: the paths of the files
+    """
+    from data.project.visualization import QUERIES
+
+    queries = [name if name in QUERIES else f"query-{name}" for name in (queries or QUERIES)]
+    unknown = [name for name in queries if name not in QUERIES]
+    if unknown:
+        raise ValueError(f"unknown queries: {', '.join(unknown)}")
+
+    os.makedirs(directory, exist_ok=True)
+    tasks = [(name, os.path.join(directory, f"{name}.{image_format}")) for name in queries]
+
+    if workers is None or workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker,
+                                 initargs=(dataset,)) as executor:
+            return list(executor.map(_render_in_worker, *zip(*tasks)))
+
+    with headless():
+        return [_render_query(dataset, name, file_name) for name, file_name in tasks]
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Renders queries of a dataset from the command line, e.g.
+    python -m data.project.render --read csv ./data -o ./images --queries 1 3 --image-format svg
+
+    :param argv: the arguments (sys.argv is used when it is omitted)
+    :return: the exit code
+    """
+    from data.project.formats import get_format, format_names, is_database
+    from data.project.model import CompanyDataset
+
+    readers = [name for name in format_names() if name == "sqlite" or not is_database(name)]
+
+    parser = argparse.ArgumentParser(prog="python -m data.project.render",
+                                     description="Renders the queries of a dataset to image files.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--read", nargs=2, metavar=("FORMAT", "PATH"), help=f"one of: {', '.join(readers)}")
+    source.add_argument("--generate", nargs=3, type=int, metavar=("PEOPLE", "JOBS", "COMPANIES"))
+    parser.add_argument("--seed", help="the seed of the generation")
+    parser.add_argument("--queries", nargs="+", metavar="ID", help="the queries to render (all by default)")
+    parser.add_argument("--image-format", default="png", help="png, svg, pdf...")
+    parser.add_argument("--workers", type=int, default=1, help="the number of rendering processes")
+    parser.add_argument("-o", "--output", required=True, metavar="DIRECTORY", help="the directory of the images")
+    args = parser.parse_args(argv)
+
+    if args.read is not None:
+        if args.read[0] not in readers:
+            parser.error(f"unknown format: {args.read[0]}")
+        location = sqlite3.connect(args.read[1]) if args.read[0] == "sqlite" else args.read[1]
+        dataset = get_format(args.read[0]).read_dataset(CompanyDataset, location)
+    else:
+        dataset = CompanyDataset.generate(*args.generate, seed=args.seed)
+
+    try:
+        for file_name in render(dataset, args.output, args.queries, args.image_format, args.workers):
+            print(file_name)
+    except ValueError as e:
+        parser.error(str(e))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
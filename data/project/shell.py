@@ -1,9 +1,14 @@
-from mysql.connector import MySQLConnection
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from data.project.handler import CSVHandler, JSONHandler, XLSXHandler, SQLHandler
+import data.project.instrumentation as instrumentation
+from data.project.cache import DatasetCache
+from data.project.formats import COMPRESSIONS, get_format, detect_format, format_names, is_database
 from data.project.model import CompanyDataset
-import mysql
-import data.project.visualization as visualization
+from data.project.pool import ConnectionPool, mysql_backend, sqlite_backend
 
 
 def help_message() -> str:
@@ -29,23 +34,59 @@ Commands:
 
     read <format> <path>
         Reads the dataset in a given format, from a given place of your file system.
-        <format> is one of the following parameters: csv, json, xlsx, mysql
-        <path> is a path of a folder which contains the needed file(s). The parameter must be omitted when you select mysql as the format.
+        <format> is one of the following parameters: csv, json, jsonl, xlsx, parquet, mysql, sqlite, snapshot
+        <path> is a path of a folder which contains the needed file(s). The parameter must be omitted when you select mysql as the format,
+        and it is the path of the database file when you select sqlite. Database connections are opened on first use.
+        Snapshots are memory-mapped, so they are read almost instantly and queried without loading them. The columns of
+        Parquet documents are read when a query first needs them.
 
-    write <format> <path>
+    read <path>
+        Reads the dataset from a folder, and detects its format from the names of the files. <path> can also be one of
+        the files (e.g. ./out/people.csv or ./out/dataset.xlsx), then the dataset is read from its folder; an sqlite
+        database is given by its file.
+
+        Parsed documents are cached on the disk (in $DATA_PROJECT_CACHE or ~/.cache/data-project), so unchanged files
+        are read again from the cache, even in a later session.
+
+    cache clear
+        Removes the cached datasets.
+
+    write <format> <path> [<compression>]
         Writes the dataset in a given format, to a given place of your file system.
-        <format> is one of the following parameters: csv, json, xlsx, mysql
-        <path> is a path of a folder which will contain the generated file(s). The parameter must be omitted when you select mysql as the format.
+        <format> is one of the following parameters: csv, json, jsonl, xlsx, parquet, mysql, sqlite, snapshot
+        <path> is a path of a folder which will contain the generated file(s). The parameter must be omitted when you select mysql as the format,
+        and it is the path of the database file when you select sqlite.
+        <compression> compresses csv, json and jsonl documents: gz, bz2, xz, zst or lz4 (the latter two need the zstandard
+        and lz4 packages). Compressed documents are detected and decompressed by read.
+
+    write-changes <format> <path> [<compression>]
+        Writes only the changes of the dataset since it was last read or written, to the place of that write. Added
+        entities are appended and changed collections are rewritten (csv, json, jsonl), or the changed rows are upserted
+        and the deleted ones are deleted (mysql, sqlite).
+
+    stats [on [profile] [memory] | off | reset | export <path>]
+        Shows the time spent in the stages of reading, writing and generation (with the counted rows, bytes and
+        batches). The measurements are collected while they are turned on; profile adds a cProfile profile of every
+        function call, memory traces the peak memory of the stages. export saves them to a JSON file.
 
     query-<id>
         Executes the queries, explains and visualizes their output.
+
+    render-all <path> [<id> ...]
+        Renders the queries (all of them, or the given ones) to PNG files into the folder <path> without displaying them.
+
+The commands can also be executed non-interactively, from the command line or from a file (one command per line):
+    python -m data.project.shell -c "generate 1000 20 10" -c "write csv ./out" -c "write json ./out"
+    python -m data.project.shell --script nightly.txt [--keep-going]
+Consecutive writes are executed concurrently, and the exit code is 0 only if every command succeeded.
 """
 
 
-def get_connection() -> MySQLConnection:
+def get_pool() -> ConnectionPool:
     """
-    Reads properties of a MySQL connection, then creates the connection.
-    :return: the connection
+    Reads properties of a MySQL connection, then creates a pool of such connections. The connections are opened when
+    they are first used.
+    :return: the pool
     """
 
     print("Enter db host:")
@@ -64,15 +105,275 @@ def get_connection() -> MySQLConnection:
     print("$", end=" ")
     database = input()
 
-    return mysql.connector.connect(
+    return ConnectionPool(mysql_backend(
         host=host, # remotemysql.com
         user=user, # HcEDzgO0w7
-        passwd=password, # iFBetQkGwX
+        password=password, # iFBetQkGwX
         database=database
-    )
+    ))
+
+
+class CommandError(Exception):
+    """
+    Raised when a command is unknown or malformed.
+    """
+
+
+class Session:
+    """
+    The state of a shell session (the dataset, the open connection pools and the cache), which executes commands.
+    """
+
+    def __init__(self, headless: bool = False):
+        """
+        Creates a session.
+
+        :param headless: tells whether queries should be rendered without displaying them (in batch mode)
+        """
+        self.dataset = None
+        self.dataset_type = CompanyDataset  # TODO change this to your own type
+        self.headless = headless
+        self.pools = {}
+        self.cache = DatasetCache()
+
+    def pool(self, t: list[str]) -> ConnectionPool:
+        """
+        Returns the pool of a database, creates it on first use.
+
+        :param t: the tokens of the command
+        :return: the pool
+        """
+        key = (t[1], t[2] if t[1] == "sqlite" else None)
+        if key not in self.pools:
+            self.pools[key] = get_pool() if t[1] == "mysql" else ConnectionPool(sqlite_backend(t[2]))
+        return self.pools[key]
+
+    def location(self, t: list[str]) -> object:
+        """
+        Returns the location of a dataset in a read or write command: a connection pool for databases, a path otherwise.
+
+        :param t: the tokens of the command
+        :return: the location
+        """
+        if len(t) < (2 if t[1] == "mysql" else 3):
+            raise CommandError(f"the path is missing: {' '.join(t)}")
+        return self.pool(t) if is_database(t[1]) else t[2]
+
+    def read(self, t: list[str]) -> object:
+        """
+        Reads the dataset of a read command. Snapshots and Parquet documents are read in columnar form, so only the
+        columns used by the queries are loaded. Other documents are cached.
+
+        :param t: the tokens of the command (the format is detected when it is omitted, and a detected document is
+            read from its folder, with the rest of the dataset)
+        :return: the dataset
+        """
+        if len(t) == 2 and t[1] not in format_names():
+            try:
+                t = [t[0], detect_format(t[1]), t[1]]
+            except ValueError as error:
+                raise CommandError(str(error)) from error
+            if not is_database(t[1]) and os.path.isfile(t[2]):
+                t[2] = os.path.dirname(t[2]) or "."
+        self.require_format(t[1])
+        if t[1] in ("snapshot", "parquet"):
+            from data.project.columnar import ColumnarCompanyDataset
+
+            return get_format(t[1]).read_dataset(ColumnarCompanyDataset, self.location(t))
+        if is_database(t[1]):
+            return get_format(t[1]).read_dataset(self.dataset_type, self.location(t))
+        return self.cache.read_dataset(t[1], self.location(t), self.dataset_type,
+                                       lambda: get_format(t[1]).read_dataset(self.dataset_type, t[2]))
+
+    def write(self, t: list[str]) -> None:
+        """
+        Writes the dataset in a write command. The tracked changes are not cleared here, since the same dataset may be
+        written to multiple places concurrently.
+
+        :param t: the tokens of the command
+        :return: nothing
+        """
+        if len(t) < 2:
+            raise CommandError("usage: write <format> <path> [<compression>]")
+        self.require_dataset()
+        self.require_format(t[1])
+        get_format(t[1]).write_dataset(self.dataset, self.location(t), **self.compression(t))
+
+    @staticmethod
+    def compression(t: list[str]) -> dict[str, str]:
+        """
+        Returns the extension of the compressed documents of a write command, if it has a compression.
+
+        :param t: the tokens of the command
+        :return: the keyword arguments of the handler
+        """
+        if len(t) < 4:
+            return {}
+        if t[1] not in ("csv", "json", "jsonl") or f".{t[3]}" not in COMPRESSIONS:
+            raise CommandError(f"unsupported compression: {' '.join(t)}")
+        return {"extension": f".{t[1]}.{t[3]}"}
+
+    def require_dataset(self) -> None:
+        if self.dataset is None:
+            raise CommandError("there is no dataset, generate or read one first")
+
+    @staticmethod
+    def require_format(name: str) -> None:
+        if name not in format_names():
+            raise CommandError(f"unknown format: {name}, the formats are {', '.join(format_names())}")
 
+    def execute(self, tokens: list[str]) -> bool:
+        """
+        Executes a command.
 
-def main() -> None:
+        :param tokens: the tokens of the command
+        :return: False if the session should be terminated, True otherwise
+        """
+        if tokens[0] == "exit":
+            return False
+        elif tokens[0] == "help":
+            print(help_message())
+        elif tokens[0] == "generate":
+            if len(tokens) != 4:
+                raise CommandError("usage: generate <count-of-people> <count-of-jobs> <count-of-companies>")
+            self.dataset = self.dataset_type.generate(int(tokens[1]), int(tokens[2]), int(tokens[3]))
+        elif tokens[0] == "write" and len(tokens) >= 2:
+            self.write(tokens)
+            if hasattr(self.dataset, "clear_changes"):
+                self.dataset.clear_changes()
+        elif tokens[0] == "write-changes" and len(tokens) >= 2:
+            self.require_dataset()
+            if not hasattr(self.dataset, "changes"):  # e.g. the columnar datasets of snapshots and Parquet documents
+                raise CommandError("the dataset does not track changes; use write")
+            self.require_format(tokens[1])
+            print(get_format(tokens[1]).write_changes(self.dataset, self.location(tokens), **self.compression(tokens)))
+        elif tokens[0] == "read" and len(tokens) >= 2:
+            self.dataset = self.read(tokens)
+        elif tokens[0] == "stats":
+            if len(tokens) == 1:
+                print(instrumentation.report())
+            elif tokens[1] == "on":
+                instrumentation.enable(profile="profile" in tokens[2:], memory="memory" in tokens[2:])
+            elif tokens[1] == "off":
+                instrumentation.disable()
+            elif tokens[1] == "reset":
+                instrumentation.reset()
+            elif len(tokens) == 3 and tokens[1] == "export":
+                instrumentation.export(tokens[2])
+            else:
+                raise CommandError("usage: stats [on [profile] [memory] | off | reset | export <path>]")
+        elif tokens == ["cache", "clear"]:
+            print(f"{self.cache.clear()} cached datasets removed")
+        elif tokens[0].startswith("query-"):
+            import data.project.visualization as visualization
+
+            if tokens[0] not in visualization.QUERIES:
+                raise CommandError(f"unknown query: {tokens[0]}")
+            self.require_dataset()
+            if self.headless:
+                import matplotlib.pyplot as plt
+                from data.project.render import headless
+
+                with headless():
+                    plt.close(visualization.QUERIES[tokens[0]](self.dataset, show=False))
+            else:
+                visualization.QUERIES[tokens[0]](self.dataset)
+        elif tokens[0] == "render-all" and len(tokens) >= 2:
+            import data.project.render as render
+
+            self.require_dataset()
+            for file_name in render.render(self.dataset, tokens[1], tokens[2:]):
+                print(file_name)
+        else:
+            raise CommandError(f"unknown command: {' '.join(tokens)}")
+        return True
+
+    def close(self) -> None:
+        """
+        Closes the connection pools.
+
+        :return: nothing
+        """
+        for p in self.pools.values():
+            p.close()
+        self.pools = {}
+
+
+def _steps(commands: list[str]) -> list[list[list[str]]]:
+    """
+    Splits a script into steps: consecutive write commands only read the dataset, so they form a single step and are
+    executed concurrently, every other command is a step of its own.
+
+    :param commands: the lines of the script (empty lines and comments starting with # are skipped)
+    :return: the list of steps, each is a list of tokenized commands
+    """
+    steps = []
+    for line in commands:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        tokens = line.split()
+        if tokens[0] == "write" and steps and steps[-1][-1][0] == "write":
+            steps[-1].append(tokens)
+        else:
+            steps.append([tokens])
+    return steps
+
+
+def run_script(commands: list[str], session: Session = None, keep_going: bool = False) -> int:
+    """
+    Executes commands non-interactively, and prints the outcome and the duration of every step. Consecutive writes
+    are executed concurrently (see _steps).
+
+    :param commands: the commands
+    :param session: the session, a new headless one is created when it is omitted
+    :param keep_going: tells whether the following steps should be executed after a failed one
+    :return: the exit code: 0 if every command succeeded, 1 if a command failed, 2 if a command was malformed
+    """
+    session = session if session is not None else Session(headless=True)
+    exit_code = 0
+    start = time.perf_counter()
+    try:
+        for step in _steps(commands):
+            step_start = time.perf_counter()
+            if len(step) == 1:
+                outcomes = [_outcome(lambda: session.execute(step[0]))]
+            else:
+                for tokens in step:  # database connections are set up (and credentials are asked for) one by one
+                    if len(tokens) >= 2 and tokens[1] in format_names() and is_database(tokens[1]):
+                        _outcome(lambda: session.location(tokens))
+                with ThreadPoolExecutor(max_workers=len(step)) as executor:
+                    outcomes = list(executor.map(lambda t: _outcome(lambda: session.write(t)), step))
+                if all(error is None for error in outcomes) and hasattr(session.dataset, "clear_changes"):
+                    session.dataset.clear_changes()
+            seconds = time.perf_counter() - step_start
+
+            for tokens, error in zip(step, outcomes):
+                command = " ".join(tokens)
+                if error is None:
+                    print(f"[ok]     {command} ({seconds:.3f} s{', concurrently' if len(step) > 1 else ''})")
+                else:
+                    print(f"[failed] {command}: {type(error).__name__}: {error}", file=sys.stderr)
+                    exit_code = max(exit_code, 2 if isinstance(error, CommandError) else 1)
+            if exit_code and not keep_going:
+                break
+            if step[0][0] == "exit":
+                break
+    finally:
+        session.close()
+    print(f"{'finished' if exit_code == 0 else 'failed'} in {time.perf_counter() - start:.3f} s")
+    return exit_code
+
+
+def _outcome(function) -> Exception | None:
+    try:
+        function()
+        return None
+    except Exception as e:
+        return e
+
+
+def interactive() -> None:
     """
     Starts an interactive shell.
 
@@ -80,58 +381,55 @@ def main() -> None:
     """
     print(help_message())
 
-    connection = get_connection()
+    session = Session()
+    try:
+        while True:
+            try:
+                print("$", end=" ")
+                tokens = input().split()
+                if tokens and not session.execute(tokens):
+                    break
+            except EOFError:
+                break
+            except Exception as e:
+                print(f"command cannot be executed: {e}")
+    finally:
+        session.close()
 
-    dataset = None
-    dataset_type = CompanyDataset  # TODO change this to your own type
 
-    writers = {
-        "csv": lambda t: CSVHandler.write_dataset(dataset, t[2]),
-        "xlsx": lambda t: XLSXHandler.write_dataset(dataset, t[2]),
-        "json": lambda t: JSONHandler.write_dataset(dataset, t[2]),
-        "mysql": lambda t: SQLHandler.write_dataset(dataset, connection)
-    }
+def main(argv: list[str] = None) -> int:
+    """
+    Starts an interactive shell, or executes a script of commands, e.g.
+    python -m data.project.shell -c "generate 1000 20 10" -c "write csv ./out" -c "write json ./out"
+    python -m data.project.shell --script nightly.txt
 
-    readers = {
-        "csv": lambda t: CSVHandler.read_dataset(dataset_type, t[2]),
-        "xlsx": lambda t: XLSXHandler.read_dataset(dataset_type, t[2]),
-        "json": lambda t: JSONHandler.read_dataset(dataset_type, t[2]),
-        "mysql": lambda t: SQLHandler.read_dataset(dataset_type, connection)
-    }
+    :param argv: the arguments (sys.argv is used when it is omitted)
+    :return: the exit code
+    """
+    parser = argparse.ArgumentParser(prog="python -m data.project.shell",
+                                     description="Generates, reads, writes and queries datasets.")
+    parser.add_argument("-c", "--command", action="append", default=[], metavar="COMMAND",
+                        help="a command to execute (can be repeated)")
+    parser.add_argument("--script", metavar="FILE", help="a file of commands, one per line (- means stdin)")
+    parser.add_argument("--keep-going", action="store_true", help="continue after a failed command")
+    args = parser.parse_args(argv)
+
+    if args.script is None and not args.command:
+        interactive()
+        return 0
 
-    while True:
+    commands = []
+    if args.script is not None:
         try:
-            print("$", end=" ")
-            line = input()
-            tokens = line.split(" ")
-            if tokens[0] == "exit":
-                connection.close()
-                break
-            elif tokens[0] == "help":
-                print(help_message())
-            elif len(tokens) == 4 and tokens[0] == "generate":
-                dataset = dataset_type.generate(int(tokens[1]), int(tokens[2]), int(tokens[3]))
-            elif tokens[0] == "write":
-                writers[tokens[1]](tokens)
-            elif tokens[0] == "read":
-                dataset = readers[tokens[1]](tokens)
-            elif tokens[0] == "query-1": # TODO
-                visualization.avg_age_by_company(dataset)
-            elif tokens[0] == "query-2": # TODO
-                visualization.employees_by_companies(dataset)
-            elif tokens[0] == "query-3": # TODO
-                visualization.distribution_of_paygrades(dataset)
-            elif tokens[0] == "query-4": # it is an extra example
-                visualization.distances_by_types_with_limit(dataset)
-            elif tokens[0] == "query-5": # it is an extra example
-                visualization.genders_by_ages_heatmap(dataset)
-            elif tokens[0] == "query-6": # it is an extra example
-                visualization.distances_by_countries_and_sexes(dataset)
+            if args.script == "-":
+                commands = sys.stdin.read().splitlines()
             else:
-                raise RuntimeError("unknown command")
-        except Exception:
-            print("command cannot be executed")
+                with open(args.script, "r", encoding="utf-8") as file:
+                    commands = file.read().splitlines()
+        except OSError as e:
+            parser.exit(2, f"cannot read the script: {e}\n")
+    return run_script(commands + args.command, keep_going=args.keep_going)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Type
+
+import numpy as np
+
+from data.project.base import Dataset
+from data.project.columnar import ColumnarCompanyDataset, StringColumn, PackedStringColumn, Column
+from data.project.instrumentation import timed
+
+META_FILE = "snapshot.json"
+VERSION = 1
+
+
+class SnapshotHandler:
+    """
+    A class that handles binary snapshots of company datasets. A snapshot is a folder of .npy files, one for each
+    column (dictionary-encoded and other strings are stored as codes and packed UTF-8 buffers), and a snapshot.json
+    file which describes them. The files are memory-mapped on read, so even a huge dataset is reopened almost instantly
+    and without copying; the pages are loaded by the operating system when they are accessed.
+    """
+
+    @staticmethod
+    def _save(path: str, name: str, array: np.ndarray) -> None:
+        np.save(os.path.join(path, name + ".npy"), np.ascontiguousarray(array), allow_pickle=False)
+
+    @staticmethod
+    def _load(path: str, name: str) -> np.ndarray:
+        return np.load(os.path.join(path, name + ".npy"), mmap_mode="r", allow_pickle=False)
+
+    @staticmethod
+    def write_column(column: Column, path: str, name: str) -> dict:
+        """
+        Writes a column to .npy files.
+
+        :param column: the column
+        :param path: the path of the snapshot
+        :param name: the base name of the files
+        :return: the description of the column
+        """
+        if isinstance(column, StringColumn):
+            categories = PackedStringColumn.encode(column.categories)
+            SnapshotHandler._save(path, name + ".codes", column.codes)
+            SnapshotHandler._save(path, name + ".categories.data", categories.data)
+            SnapshotHandler._save(path, name + ".categories.offsets", categories.offsets)
+            return {"kind": "category"}
+        if isinstance(column, PackedStringColumn) or column.dtype == object:
+            packed = column if isinstance(column, PackedStringColumn) else PackedStringColumn.encode(column.tolist())
+            SnapshotHandler._save(path, name + ".data", packed.data)
+            SnapshotHandler._save(path, name + ".offsets", packed.offsets)
+            return {"kind": "string"}
+        SnapshotHandler._save(path, name, column)
+        return {"kind": "numeric", "dtype": column.dtype.str}
+
+    @staticmethod
+    def read_column(description: dict, path: str, name: str) -> Column:
+        """
+        Memory-maps a column from .npy files.
+
+        :param description: the description of the column
+        :param path: the path of the snapshot
+        :param name: the base name of the files
+        :return: the column
+        """
+        load = SnapshotHandler._load
+        if description["kind"] == "category":
+            categories = PackedStringColumn(load(path, name + ".categories.data"),
+                                            load(path, name + ".categories.offsets"))
+            return StringColumn(load(path, name + ".codes"), categories.decode())
+        if description["kind"] == "string":
+            return PackedStringColumn(load(path, name + ".data"), load(path, name + ".offsets"))
+        return load(path, name)
+
+    @staticmethod
+    @timed("snapshot.read_dataset")
+    def read_dataset(dataset_type: Type[Dataset], path: str) -> Dataset:
+        """
+        Reads a dataset from a snapshot. A ColumnarCompanyDataset is backed by the memory-mapped files directly, other
+        types (like CompanyDataset) are created from its entities.
+
+        :param dataset_type: the type of the dataset
+        :param path: the path of the snapshot (a folder)
+        :return: the instance
+        """
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        if meta.get("version") != VERSION:
+            raise ValueError(f"unsupported snapshot version: {meta.get('version')}")
+
+        columns = {}
+        for entity_type in ColumnarCompanyDataset.entity_types():
+            descriptions = meta["collections"][entity_type.collection_name()]
+            columns[entity_type] = {
+                name: SnapshotHandler.read_column(descriptions[name], path, f"{entity_type.collection_name()}.{name}")
+                for name in entity_type.field_names()
+            }
+        dataset = ColumnarCompanyDataset(columns)
+
+        if issubclass(ColumnarCompanyDataset, dataset_type):
+            return dataset
+        return dataset_type.from_sequence([list(dataset.view(entity_type)) for entity_type in dataset.entity_types()])
+
+    @staticmethod
+    @timed("snapshot.write_dataset")
+    def write_dataset(dataset: Dataset, path: str) -> None:
+        """
+        Writes a dataset to a snapshot. Datasets of objects are converted to columnar form first.
+
+        :param dataset: the dataset instance
+        :param path: the path of the snapshot (a folder, it is created if it does not exist)
+        :return: nothing
+        """
+        if not isinstance(dataset, ColumnarCompanyDataset):
+            dataset = ColumnarCompanyDataset.from_objects(dataset)
+
+        os.makedirs(path, exist_ok=True)
+        meta = {"version": VERSION, "collections": {}}
+        for entity_type in dataset.entity_types():
+            meta["collections"][entity_type.collection_name()] = {
+                name: SnapshotHandler.write_column(dataset.column(entity_type, name), path,
+                                                   f"{entity_type.collection_name()}.{name}")
+                for name in entity_type.field_names()
+            }
+
+        with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as file:
+            json.dump(meta, file, indent=2)